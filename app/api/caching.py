@@ -0,0 +1,29 @@
+import hashlib
+from typing import Hashable, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+def make_etag(*parts: Hashable) -> str:
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_get(request: Request, response: Response, *parts: Hashable) -> Optional[Response]:
+    headers = {"ETag": make_etag(*parts), "Cache-Control": settings.CATALOG_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def json_response(response: Response, content: bytes) -> Response:
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
@@ -6,6 +6,8 @@ from app.db.session import get_db
 from app.core.config import settings
 from app.core.security import verify_token
 from app.crud import user as crud_user
+from app.crud import product as crud_product
+from typing import Optional, Tuple
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -48,3 +50,15 @@ def get_current_admin(current_user = Depends(get_current_active_user)):
             detail="Not enough permissions"
         )
     return current_user
+
+
+def get_product_fields(fields: Optional[str] = None) -> Optional[Tuple[str, ...]]:
+    if fields is None:
+        return None
+    selected = crud_product.parse_fields(fields)
+    if selected is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be a comma-separated list of: {', '.join(crud_product.PRODUCT_FIELDS)}"
+        )
+    return selected
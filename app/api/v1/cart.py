@@ -23,8 +23,7 @@ def add_to_cart(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    crud_cart.add_to_cart(db, user_id=current_user.id, product_id=item.product_id, qty=item.qty)
-    return crud_cart.get_cart_with_items(db, user_id=current_user.id)
+    return crud_cart.add_to_cart(db, user_id=current_user.id, product_id=item.product_id, qty=item.qty)
 
 
 @router.post("/remove", response_model=CartOut)
@@ -33,5 +32,4 @@ def remove_from_cart(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    crud_cart.remove_from_cart(db, user_id=current_user.id, product_id=item.product_id)
-    return crud_cart.get_cart_with_items(db, user_id=current_user.id)
+    return crud_cart.remove_from_cart(db, user_id=current_user.id, product_id=item.product_id)
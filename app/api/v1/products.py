@@ -1,44 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import io
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.schemas.product import ProductOut, ProductCreate, ProductUpdate, ProductList
+from app.api.caching import conditional_get, json_response
+from app.search.cache import normalize_query
+from app.schemas.product import ProductOut, ProductCreate, ProductUpdate, ProductList, ProductBatch, ProductImportReport
 from app.crud import product as crud_product
-from app.api.deps import get_current_admin
-from typing import Optional
+from app.crud import product_import as crud_product_import
+from app.crud import product_export as crud_product_export
+from app.api.deps import get_current_admin, get_product_fields
+from app.core.config import settings
+from typing import Optional, Tuple
 
 router = APIRouter()
 
 
 @router.get("", response_model=ProductList)
 def list_products(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
     category: Optional[str] = None,
     q: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^popular$"),
+    facets: bool = False,
+    cursor: Optional[str] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(get_product_fields),
     db: Session = Depends(get_db)
 ):
+    state = crud_product.sync_catalog(db)
+    if sort == "popular":
+        state = f"{state}.{crud_product.popularity_version(db)}"
+    not_modified = conditional_get(
+        request, response, "products", state,
+        page, size, category, normalize_query(q) if q else None, sort, facets, cursor, fields
+    )
+    if not_modified:
+        return not_modified
+    
+    after = None
+    if cursor:
+        after = crud_product.decode_cursor(cursor)
+        if after is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
     skip = (page - 1) * size
-    products, total = crud_product.get_products(
-        db, skip=skip, limit=size, category=category, search=q
+    result = crud_product.get_products(
+        db, skip=skip, limit=size, category=category, search=q, sort=sort, facets=facets, after=after, fields=fields
     )
     
-    return {
-        "total": total,
-        "page": page,
-        "size": size,
-        "items": products
-    }
+    return json_response(response, crud_product.render_page_json({
+        **result,
+        "page": None if cursor else page,
+        "size": size
+    }, fields))
+
+
+@router.get("/batch", response_model=ProductBatch)
+def get_products_batch(
+    request: Request,
+    response: Response,
+    ids: Optional[str] = None,
+    slugs: Optional[str] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(get_product_fields),
+    db: Session = Depends(get_db)
+):
+    try:
+        product_ids = [int(product_id) for product_id in (ids or "").split(",") if product_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    product_slugs = [slug.strip() for slug in (slugs or "").split(",") if slug.strip()]
+    if not product_ids and not product_slugs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass ids or slugs"
+        )
+    if len(product_ids) + len(product_slugs) > settings.PRODUCT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_SIZE} products per batch"
+        )
+    
+    not_modified = conditional_get(
+        request, response, "products-batch", crud_product.sync_catalog(db), product_ids, product_slugs, fields
+    )
+    if not_modified:
+        return not_modified
+    
+    result = crud_product.get_products_batch(db, product_ids, product_slugs, fields)
+    return json_response(response, crud_product.render_page_json(result, fields))
+
+
+@router.get("/export")
+def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user = Depends(get_current_admin)
+):
+    exporter, media_type = crud_product_export.EXPORTERS[format]
+    return StreamingResponse(
+        exporter(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
 
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = crud_product.get_product_by_id(db, product_id=product_id)
+def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[Tuple[str, ...]] = Depends(get_product_fields),
+    db: Session = Depends(get_db)
+):
+    version = crud_product.get_product_version(db, product_id=product_id)
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    not_modified = conditional_get(request, response, "product", product_id, version, fields)
+    if not_modified:
+        return not_modified
+    
+    product = crud_product.get_cached_product(db, product_id=product_id, fields=fields, version=version)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    return product
+    return json_response(response, crud_product.get_product_json(product, fields))
 
 
 @router.post("", response_model=ProductOut, status_code=status.HTTP_201_CREATED)
@@ -71,3 +169,32 @@ def update_product(
             detail="Product not found"
         )
     return updated_product
+
+
+@router.post("/import", response_model=ProductImportReport)
+def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = {"ndjson": "ndjson", "jsonl": "ndjson", "csv": "csv"}.get(extension)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not infer import format, pass format=ndjson or format=csv"
+            )
+    
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        rows = crud_product_import.READERS[format](stream)
+        return crud_product_import.import_products(db, rows)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded"
+        )
+    finally:
+        stream.detach()
@@ -1,21 +1,111 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.schemas.recommendation import RecommendationResponse
+from app.schemas.recommendation import (
+    RecommendationResponse,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    RecommendationCacheStats,
+    ImpressionLogStats,
+    ModelInfo
+)
+from app.ml.impressions import impressions
 from app.ml.recommender import recommender
-from app.api.deps import get_current_active_user
+from app.ml.retrain import request_retrain
+from app.api.deps import get_current_active_user, get_current_admin
 from app.models.user import User
 from app.crud import user as crud_user
-from typing import Optional
+from app.crud import product as crud_product
+from typing import List, Optional
 
 router = APIRouter()
 
 
-@router.get("/{user_id}", response_model=RecommendationResponse)
+def _with_products(db: Session, recommendation_lists: List[List[dict]]) -> List[List[dict]]:
+    products = crud_product.get_cached_products(
+        db, (item["product_id"] for recommendations in recommendation_lists for item in recommendations)
+    )
+    return [
+        [{**item, "product": products[item["product_id"]]} for item in recommendations if item["product_id"] in products]
+        for recommendations in recommendation_lists
+    ]
+
+
+@router.get("/me", response_model=RecommendationResponse, response_model_exclude_unset=True)
+def get_my_recommendations(
+    context: Optional[str] = Query("homepage"),
+    product_id: Optional[int] = None,
+    limit: int = Query(10, ge=1, le=50),
+    include: Optional[str] = Query(None, pattern="^product$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    recommendations = recommender.get_recommendations(
+        db, user_id=current_user.id, limit=limit, context=context, product_id=product_id
+    )
+    impressions.log(current_user.id, recommendations, {"context": context, "product_id": product_id})
+    if include:
+        recommendations, = _with_products(db, [recommendations])
+
+    return {
+        "user_id": current_user.id,
+        "recommendations": recommendations
+    }
+
+
+@router.post("/batch", response_model=BatchRecommendationResponse, response_model_exclude_unset=True)
+def get_batch_recommendations(
+    batch: BatchRecommendationRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    recommendations = recommender.get_batch_recommendations(
+        db, user_ids=batch.user_ids, limit=batch.limit, context=batch.context
+    )
+    for user_id, user_recommendations in recommendations.items():
+        impressions.log(user_id, user_recommendations, {"context": batch.context, "batch": True})
+    if batch.include:
+        recommendations = dict(zip(recommendations, _with_products(db, list(recommendations.values()))))
+
+    return {
+        "results": [
+            {"user_id": user_id, "recommendations": recommendations[user_id]}
+            for user_id in dict.fromkeys(batch.user_ids)
+            if user_id in recommendations
+        ],
+        "unknown_user_ids": [user_id for user_id in dict.fromkeys(batch.user_ids) if user_id not in recommendations]
+    }
+
+
+@router.get("/cache/stats", response_model=RecommendationCacheStats)
+def get_cache_stats(current_user = Depends(get_current_admin)):
+    return recommender.cache.stats()
+
+
+@router.get("/impressions/stats", response_model=ImpressionLogStats)
+def get_impression_stats(current_user = Depends(get_current_admin)):
+    return impressions.stats()
+
+
+@router.get("/model", response_model=ModelInfo)
+def get_model_info(current_user = Depends(get_current_admin)):
+    recommender.sync_artifacts(force=True)
+    return recommender.model_info()
+
+
+@router.post("/retrain", response_model=ModelInfo, status_code=status.HTTP_202_ACCEPTED)
+def retrain_model(current_user = Depends(get_current_admin)):
+    request_retrain()
+    return recommender.model_info()
+
+
+@router.get("/{user_id}", response_model=RecommendationResponse, response_model_exclude_unset=True)
 def get_recommendations(
     user_id: int,
     context: Optional[str] = Query("homepage"),
+    product_id: Optional[int] = None,
     limit: int = Query(10, ge=1, le=50),
+    include: Optional[str] = Query(None, pattern="^product$"),
     db: Session = Depends(get_db)
 ):
     user = crud_user.get_user_by_id(db, user_id=user_id)
@@ -24,27 +114,15 @@ def get_recommendations(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    recommendations = recommender.get_recommendations(db, user_id=user_id, limit=limit, context=context)
-    
-    return {
-        "user_id": user_id,
-        "recommendations": recommendations
-    }
-
 
-@router.get("/me", response_model=RecommendationResponse)
-def get_my_recommendations(
-    context: Optional[str] = Query("homepage"),
-    limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
     recommendations = recommender.get_recommendations(
-        db, user_id=current_user.id, limit=limit, context=context
+        db, user_id=user_id, limit=limit, context=context, product_id=product_id
     )
-    
+    impressions.log(user_id, recommendations, {"context": context, "product_id": product_id})
+    if include:
+        recommendations, = _with_products(db, [recommendations])
+
     return {
-        "user_id": current_user.id,
+        "user_id": user_id,
         "recommendations": recommendations
     }
@@ -1,32 +1,43 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.schemas.product import ProductOut
-from app.models.product import Product
-from typing import List, Optional
+from app.schemas.product import ProductOut, ProductSearchResult, SearchCacheStats
+from app.crud import product as crud_product
+from app.api.deps import get_current_admin, get_product_fields
+from app.api.caching import conditional_get, json_response
+from app.search.cache import normalize_query, search_cache
+from typing import List, Optional, Tuple, Union
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[ProductOut])
+@router.get("", response_model=Union[List[ProductOut], ProductSearchResult])
 def search_products(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=1),
     category: Optional[str] = None,
     limit: int = Query(20, ge=1, le=100),
+    facets: bool = False,
+    fields: Optional[Tuple[str, ...]] = Depends(get_product_fields),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Product)
-    
-    if category:
-        query = query.filter(Product.category == category)
-    
-    query = query.filter(
-        (Product.name.ilike(f"%{q}%")) | 
-        (Product.description.ilike(f"%{q}%"))
+    not_modified = conditional_get(
+        request, response, "search", crud_product.sync_catalog(db), normalize_query(q), category, limit, facets, fields
     )
+    if not_modified:
+        return not_modified
     
-    products = query.limit(limit).all()
-    return products
+    if facets:
+        products, total, facet_counts = crud_product.search_products_with_facets(
+            db, q, category=category, limit=limit, fields=fields
+        )
+        return json_response(response, crud_product.render_page_json(
+            {"total": total, "items": products, "facets": facet_counts}, fields
+        ))
+    return json_response(response, crud_product.render_products_json(
+        crud_product.search_products(db, q, category=category, limit=limit, fields=fields), fields
+    ))
 
 
 @router.get("/suggestions", response_model=List[str])
@@ -34,8 +45,10 @@ def get_suggestions(
     q: str = Query(..., min_length=1),
     db: Session = Depends(get_db)
 ):
-    products = db.query(Product.name).filter(
-        Product.name.ilike(f"%{q}%")
-    ).limit(10).all()
-    
-    return [p.name for p in products]
+    return crud_product.suggest_product_names(db, q)
+
+
+
+@router.get("/cache/stats", response_model=SearchCacheStats)
+def get_search_cache_stats(current_user = Depends(get_current_admin)):
+    return search_cache.stats()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -19,6 +19,43 @@ class Settings(BaseSettings):
     
     SENTRY_DSN: Optional[str] = None
     
+    RECOMMENDER_MODEL_TTL_SECONDS: int = 3600
+    CATALOG_SNAPSHOT_TTL_SECONDS: int = 300
+    CONTENT_NEIGHBOURS: int = 20
+    CONTENT_MAX_TERM_PRODUCTS: int = 2000
+    POPULARITY_HALF_LIFE_DAYS: float = 7.0
+    
+    RECOMMENDER_ARTIFACT_DIR: str = "./artifacts/recommender"
+    RECOMMENDER_ARTIFACT_KEEP: int = 3
+    RECOMMENDER_ARTIFACT_POLL_SECONDS: int = 30
+    RECOMMENDER_RETRAIN_ENABLED: bool = True
+    RECOMMENDER_RETRAIN_INTERVAL_MINUTES: int = 60
+    RECOMMENDATION_CACHE_SIZE: int = 10000
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 300
+    
+    IMPRESSION_QUEUE_SIZE: int = 10000
+    IMPRESSION_BATCH_SIZE: int = 500
+    IMPRESSION_FLUSH_INTERVAL_SECONDS: float = 1.0
+    IMPRESSION_SAMPLE_RATE_UNDER_PRESSURE: float = 0.1
+    
+    SEARCH_BACKEND: str = "memory"
+    SEARCH_INDEX_TTL_SECONDS: int = 300
+    FUZZY_SIMILARITY_THRESHOLD: float = 0.5
+    FACET_PRICE_BUCKETS: List[float] = [0, 50, 100, 250, 500, 1000]
+    SEARCH_CACHE_SIZE: int = 5000
+    SEARCH_CACHE_TTL_SECONDS: int = 300
+    
+    CATALOG_CACHE_CONTROL: str = "public, max-age=60"
+    PRODUCT_CACHE_SIZE: int = 10000
+    PRODUCT_CACHE_TTL_SECONDS: int = 60
+    PRODUCT_BATCH_MAX_SIZE: int = 100
+    CATALOG_SYNC_MAX_CHANGES: int = 1000
+    CATALOG_SYNC_CLOCK_SKEW_SECONDS: float = 5.0
+    
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_REPORTED_ERRORS: int = 100
+    PRODUCT_EXPORT_BATCH_SIZE: int = 1000
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
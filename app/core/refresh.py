@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import catalog_version
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshableIndex:
+    bumps_catalog_version = True
+    blocking_first_build = True
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self.built_at: Optional[float] = None
+        self._generation = 0
+        self._dirty = False
+        self._pending: Optional[List[Any]] = None
+        self._build_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        if self.built_at is None or self._dirty:
+            return True
+        if self.ttl_seconds is None:
+            return False
+        return time.monotonic() - self.built_at > self.ttl_seconds
+
+    def invalidate(self):
+        with self._lock:
+            self.built_at = None
+            self._generation += 1
+
+    def ensure_fresh(self, db: Session):
+        if self.built_at is None and self.blocking_first_build:
+            with self._build_lock:
+                if self.built_at is None:
+                    self.refresh(db)
+        elif self.is_stale and self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return self
+
+    def refresh(self, db: Session):
+        with self._lock:
+            generation = self._generation
+            self._pending = []
+        try:
+            fresh = self._build(db)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        changed = False
+        with self._lock:
+            pending, self._pending = self._pending, None
+            fresh.built_at = time.monotonic()
+            for change in pending:
+                fresh._apply(change)
+            if generation == self._generation or self.built_at is None:
+                changed = self.built_at is None or not self._same_content(fresh)
+                self._swap(fresh)
+                self.built_at = time.monotonic()
+                self._dirty = generation != self._generation or fresh.built_at is None
+        if changed and self.bumps_catalog_version:
+            catalog_version.bump()
+        return self
+
+    def update(self, change):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+            if self.built_at is not None:
+                self._apply(change)
+
+    def _refresh_in_background(self):
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        except Exception:
+            logger.exception("Background refresh of %s failed", type(self).__name__)
+        finally:
+            db.close()
+            self._build_lock.release()
+
+    def _build(self, db: Session) -> "RefreshableIndex":
+        raise NotImplementedError
+
+    def _swap(self, fresh: "RefreshableIndex"):
+        raise NotImplementedError
+
+    def _apply(self, change):
+        raise NotImplementedError
+
+    def _same_content(self, fresh: "RefreshableIndex") -> bool:
+        return False
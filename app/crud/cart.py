@@ -1,7 +1,10 @@
+from datetime import datetime
+from sqlalchemy import delete, inspect, select, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
+from app.db.upsert import dialect_insert
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
-from typing import Optional
 
 
 def get_or_create_cart(db: Session, user_id: int) -> Cart:
@@ -14,57 +17,65 @@ def get_or_create_cart(db: Session, user_id: int) -> Cart:
     return cart
 
 
-def add_to_cart(db: Session, user_id: int, product_id: int, qty: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    
-    existing_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-    
-    if existing_item:
-        existing_item.qty += qty
-    else:
-        cart_item = CartItem(cart_id=cart.id, product_id=product_id, qty=qty)
-        db.add(cart_item)
+def install_cart_item_index(engine: Engine):
+    index = next(index for index in CartItem.__table__.indexes if index.name == "ix_cart_items_cart_product")
+    if index.name in {existing["name"] for existing in inspect(engine).get_indexes("cart_items")}:
+        return
+    with engine.begin() as connection:
+        connection.execute(text("""
+            UPDATE cart_items SET qty = (
+                SELECT SUM(duplicate.qty) FROM cart_items AS duplicate
+                WHERE duplicate.cart_id = cart_items.cart_id AND duplicate.product_id = cart_items.product_id
+            )
+            WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id HAVING COUNT(*) > 1)
+        """))
+        connection.execute(text(
+            "DELETE FROM cart_items WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id)"
+        ))
+        index.create(connection)
+
+
+def add_to_cart(db: Session, user_id: int, product_id: int, qty: int):
+    now = datetime.utcnow()
+    cart = dialect_insert(db, Cart).values(user_id=user_id, created_at=now, updated_at=now)
+    cart = cart.on_conflict_do_update(
+        index_elements=["user_id"], set_={"updated_at": cart.excluded.updated_at}
+    ).returning(Cart.id)
+    cart_id = db.execute(cart).scalar_one()
     
+    item = dialect_insert(db, CartItem).values(cart_id=cart_id, product_id=product_id, qty=qty)
+    item = item.on_conflict_do_update(
+        index_elements=["cart_id", "product_id"], set_={"qty": CartItem.qty + item.excluded.qty}
+    )
+    db.execute(item)
     db.commit()
-    db.refresh(cart)
-    return cart
+    return get_cart_with_items(db, user_id)
 
 
-def remove_from_cart(db: Session, user_id: int, product_id: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
-    
-    if cart_item:
-        db.delete(cart_item)
-        db.commit()
-        db.refresh(cart)
-    
-    return cart
+def remove_from_cart(db: Session, user_id: int, product_id: int):
+    db.execute(
+        delete(CartItem)
+        .where(CartItem.cart_id == select(Cart.id).where(Cart.user_id == user_id).scalar_subquery())
+        .where(CartItem.product_id == product_id)
+    )
+    db.commit()
+    return get_cart_with_items(db, user_id)
 
 
 def get_cart_with_items(db: Session, user_id: int):
-    cart = get_or_create_cart(db, user_id)
-    items = []
-    total = 0.0
+    rows = db.execute(
+        select(CartItem.product_id, CartItem.qty, Product.name, Product.price)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .join(Product, Product.id == CartItem.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.id)
+    ).all()
     
-    for cart_item in cart.items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if product:
-            item_total = product.price * cart_item.qty
-            items.append({
-                "product_id": product.id,
-                "name": product.name,
-                "qty": cart_item.qty,
-                "price": product.price
-            })
-            total += item_total
+    items = [
+        {"product_id": row.product_id, "name": row.name, "qty": row.qty, "price": row.price}
+        for row in rows
+    ]
+    total = sum(row.price * row.qty for row in rows)
     
     return {"user_id": user_id, "items": items, "total": total}
 
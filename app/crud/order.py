@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
 from app.models.order import Order, OrderItem
-from app.models.product import Product
 from app.models.cart import Cart, CartItem
+from app.crud import product as crud_product
+from app.crud import recommendation as crud_recommendation
+from app.ml.recommender import recommender
 from datetime import datetime, timedelta
 from typing import Optional, List
 
@@ -20,8 +22,13 @@ def create_order_from_cart(
     total_amount = 0.0
     order_items_data = []
     
+    products = {
+        product.id: product
+        for product in crud_product.get_products_by_ids(db, [cart_item.product_id for cart_item in cart.items])
+    }
+    
     for cart_item in cart.items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+        product = products.get(cart_item.product_id)
         if not product or product.stock < cart_item.qty:
             continue
         
@@ -42,6 +49,11 @@ def create_order_from_cart(
         for item_data in order_items_data:
             item_data["product"].stock -= item_data["qty"]
         
+        crud_recommendation.record_purchases(db, user_id, [
+            (item_data["product_id"], item_data["product"].category)
+            for item_data in order_items_data
+        ])
+        
         delivery_eta = datetime.utcnow() + timedelta(minutes=30)
         
         order = Order(
@@ -72,12 +84,21 @@ def create_order_from_cart(
         
         db.commit()
         db.refresh(order)
-        
-        return order
     
     except Exception as e:
         db.rollback()
         raise e
+    
+    recommender.record_order(
+        [(item_data["product_id"], item_data["qty"]) for item_data in order_items_data],
+        order.placed_at
+    )
+    crud_product.notify_products_changed(crud_product.get_products_by_ids(
+        db, [item_data["product_id"] for item_data in order_items_data]
+    ))
+    recommender.invalidate_user(user_id)
+    
+    return order
 
 
 def get_order_by_id(db: Session, order_id: int, user_id: Optional[int] = None) -> Optional[Order]:
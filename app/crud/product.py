@@ -1,13 +1,151 @@
-from sqlalchemy.orm import Session
+import base64
+import json
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, load_only
+from app.core.config import settings
+from app.ml.catalog import catalog
+from app.ml.recommender import recommender
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
-from typing import List, Optional
+from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
+from app.core.cache import LRUCache, catalog_version
+from app.search.backends import search_backend
+from app.search.cache import normalize_query, search_cache
+from app.search.facets import compute_facets
+from app.search.fuzzy import trigram_index
+from app.search.index import search_index
+from app.search.suggest import suggester
+from typing import Dict, Iterable, List, Optional, Tuple
+
+product_cache = LRUCache(maxsize=settings.PRODUCT_CACHE_SIZE, ttl_seconds=settings.PRODUCT_CACHE_TTL_SECONDS)
+product_json_cache = LRUCache(maxsize=settings.PRODUCT_CACHE_SIZE)
+
+_catalog_sync = {"state": None, "id": 0, "updated_at": None}
+_catalog_sync_lock = threading.Lock()
+
+PRODUCT_FIELDS = tuple(ProductOut.model_fields)
 
 
 def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
     return db.query(Product).filter(Product.id == product_id).first()
 
 
+def parse_fields(fields: str) -> Optional[Tuple[str, ...]]:
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    if not selected or not selected <= set(PRODUCT_FIELDS):
+        return None
+    selected.add("id")
+    return tuple(field for field in PRODUCT_FIELDS if field in selected)
+
+
+def get_cached_product(
+    db: Session, product_id: int, fields: Optional[Tuple[str, ...]] = None, version: Optional[str] = None
+) -> Optional[ProductOut]:
+    product = get_cached_products(db, [product_id], fields).get(product_id)
+    if product is not None and version is not None and _version(product.updated_at) != version:
+        product_cache.invalidate_tag(("product", product_id))
+        product = get_cached_products(db, [product_id], fields).get(product_id)
+    return product
+
+
+def get_cached_products(
+    db: Session, product_ids: Iterable[int], fields: Optional[Tuple[str, ...]] = None
+) -> Dict[int, ProductOut]:
+    found = {}
+    missing = []
+    for product_id in dict.fromkeys(product_ids):
+        product = product_cache.get(product_id)
+        if product is None and fields is not None:
+            product = product_cache.get((product_id, fields))
+        if product is None:
+            missing.append(product_id)
+        else:
+            found[product_id] = product
+    if missing:
+        version = catalog_version.value
+        if fields is None:
+            loaded = [ProductOut.model_validate(product) for product in get_products_by_ids(db, missing)]
+        else:
+            loaded = _load_projected(db, missing, fields)
+        for product in loaded:
+            found[product.id] = product
+            if catalog_version.value == version:
+                key = product.id if fields is None else (product.id, fields)
+                product_cache.set(key, product, tags=[("product", product.id)])
+    return found
+
+
+def _load_projected(db: Session, product_ids: List[int], fields: Tuple[str, ...]) -> List[ProductOut]:
+    columns = [field for field in PRODUCT_FIELDS if field in fields or field == "updated_at"]
+    products = (
+        db.query(Product)
+        .options(load_only(*(getattr(Product, column) for column in columns)))
+        .filter(Product.id.in_(product_ids))
+    )
+    return [
+        ProductOut.model_construct(**{column: getattr(product, column) for column in columns})
+        for product in products
+    ]
+
+
+def get_product_json(product: ProductOut, fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    key = (product.id, product.updated_at, fields)
+    fragment = product_json_cache.get(key)
+    if fragment is None:
+        fragment = product.model_dump_json(include=set(fields) if fields else None).encode()
+        product_json_cache.set(key, fragment)
+    return fragment
+
+
+def render_products_json(products: Iterable[ProductOut], fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    return b"[" + b",".join(get_product_json(product, fields) for product in products) + b"]"
+
+
+def render_page_json(page: dict, fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    parts = [
+        json.dumps(key).encode() + b":" + (
+            render_products_json(value, fields) if key == "items" else json.dumps(value).encode()
+        )
+        for key, value in page.items()
+    ]
+    return b"{" + b",".join(parts) + b"}"
+
+
+def get_products_batch(
+    db: Session, product_ids: List[int], slugs: List[str], fields: Optional[Tuple[str, ...]] = None
+) -> dict:
+    resolved = {}
+    if slugs:
+        resolved = dict(db.query(Product.slug, Product.id).filter(Product.slug.in_(slugs)).all())
+    ordered = list(dict.fromkeys(product_ids + [resolved[slug] for slug in slugs if slug in resolved]))
+    products_by_id = get_cached_products(db, ordered, fields)
+    return {
+        "items": [products_by_id[product_id] for product_id in ordered if product_id in products_by_id],
+        "missing_ids": [product_id for product_id in dict.fromkeys(product_ids) if product_id not in products_by_id],
+        "missing_slugs": [slug for slug in dict.fromkeys(slugs) if slug not in resolved]
+    }
+
+
+def get_product_version(db: Session, product_id: int) -> Optional[str]:
+    row = db.query(Product.updated_at).filter(Product.id == product_id).first()
+    if row is None:
+        return None
+    return _version(row.updated_at)
+
+
+def _version(updated_at: Optional[datetime]) -> str:
+    return updated_at.isoformat() if updated_at else "0"
+
+
+def get_products_by_ids(db: Session, product_ids: Iterable[int]) -> List[Product]:
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    return db.query(Product).filter(Product.id.in_(product_ids)).all()
+
+
 def get_product_by_slug(db: Session, slug: str) -> Optional[Product]:
     return db.query(Product).filter(Product.slug == slug).first()
 
@@ -17,22 +155,139 @@ def get_products(
     skip: int = 0, 
     limit: int = 20,
     category: Optional[str] = None,
-    search: Optional[str] = None
-) -> tuple[List[Product], int]:
+    search: Optional[str] = None,
+    sort: Optional[str] = None,
+    facets: bool = False,
+    after: Optional[dict] = None,
+    fields: Optional[Tuple[str, ...]] = None
+) -> dict:
+    if after is not None:
+        skip = after["offset"]
+    
+    if search:
+        product_ids, total, facet_counts = _search_page(db, search, category, skip, limit, sort, facets)
+        return _page(_load_in_order(db, product_ids, fields), total, facet_counts, skip, limit, skip + limit < total)
+    
+    facet_counts = None
+    if facets:
+        _, facet_counts = _facets(db, None, category)
+    
+    if sort == "popular":
+        snapshot = catalog.ensure_fresh(db)
+        product_ids, total = recommender.popularity.ensure_fresh(db).page(snapshot, category, skip, limit)
+        return _page(_load_in_order(db, product_ids, fields), total, facet_counts, skip, limit, skip + limit < total)
+    
     query = db.query(Product)
     
     if category:
         query = query.filter(Product.category == category)
     
-    if search:
-        query = query.filter(
-            (Product.name.ilike(f"%{search}%")) | 
-            (Product.description.ilike(f"%{search}%"))
-        )
+    query = query.order_by(Product.id)
+    if after is not None:
+        total = catalog.ensure_fresh(db).count(category)
+        query = query.filter(Product.id > after["id"])
+    else:
+        total = query.count()
+        query = query.offset(skip)
+    product_ids = [product_id for (product_id,) in query.with_entities(Product.id).limit(limit + 1)]
+    products = _load_in_order(db, product_ids[:limit], fields)
+    return _page(products, total, facet_counts, skip, limit, len(product_ids) > limit)
+
+
+def _page(items: List[ProductOut], total: int, facet_counts: Optional[dict], skip: int, limit: int, has_more: bool) -> dict:
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor({"id": items[-1].id, "offset": skip + limit})
+    return {
+        "total": total,
+        "items": items,
+        "facets": facet_counts,
+        "next_cursor": next_cursor
+    }
+
+
+def encode_cursor(after: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(after, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[dict]:
+    try:
+        after = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(after, dict) or not all(type(after.get(key)) is int and after[key] >= 0 for key in ("id", "offset")):
+        return None
+    return after
+
+
+def search_products(
+    db: Session, q: str, category: Optional[str] = None, limit: int = 20, fields: Optional[Tuple[str, ...]] = None
+) -> List[ProductOut]:
+    product_ids, _, _ = _search_page(db, q, category, 0, limit)
+    return _load_in_order(db, product_ids, fields)
+
+
+def search_products_with_facets(
+    db: Session, q: str, category: Optional[str] = None, limit: int = 20, fields: Optional[Tuple[str, ...]] = None
+) -> tuple[List[ProductOut], int, dict]:
+    product_ids, total, facet_counts = _search_page(db, q, category, 0, limit, facets=True)
+    return _load_in_order(db, product_ids, fields), total, facet_counts
+
+
+def _search_page(
+    db: Session,
+    q: str,
+    category: Optional[str],
+    skip: int,
+    limit: int,
+    sort: Optional[str] = None,
+    facets: bool = False
+) -> tuple[List[int], int, Optional[dict]]:
+    def compute():
+        facet_counts = None
+        if facets:
+            product_ids, total, facet_counts = _search_with_facets(db, q, category)
+        elif sort == "popular":
+            product_ids, total = _search(db, q, category=category)
+        else:
+            product_ids, total = _search(db, q, category=category, limit=skip + limit)
+        if sort == "popular":
+            product_ids = recommender.popularity.ensure_fresh(db).rank(product_ids).tolist()
+        return product_ids[skip:skip + limit], total, facet_counts
     
-    total = query.count()
-    products = query.offset(skip).limit(limit).all()
-    return products, total
+    key = (normalize_query(q), category, skip, limit, sort, facets)
+    if sort == "popular":
+        key += (popularity_version(db),)
+    return search_cache.get_or_compute(key, compute)
+
+
+def _search(db: Session, q: str, category: Optional[str] = None, limit: Optional[int] = None) -> tuple[List[int], int]:
+    product_ids, total = search_backend.search(db, q, category=category, limit=limit)
+    if not total:
+        product_ids, total = search_backend.fuzzy(db, q, category=category, limit=limit)
+    return product_ids, total
+
+
+def _search_with_facets(db: Session, q: str, category: Optional[str]) -> tuple[List[int], int, dict]:
+    for find in (search_backend.search, search_backend.fuzzy):
+        product_ids, _ = find(db, q)
+        product_ids, facet_counts = _facets(db, product_ids, category)
+        if product_ids.size:
+            break
+    return product_ids.tolist(), len(product_ids), facet_counts
+
+
+def _facets(db: Session, product_ids: Optional[List[int]], category: Optional[str]):
+    return compute_facets(catalog.ensure_fresh(db), product_ids, category, settings.FACET_PRICE_BUCKETS)
+
+
+def suggest_product_names(db: Session, q: str, limit: int = 10) -> List[str]:
+    return suggester.ensure_fresh(db).suggest(q, limit=limit)
+
+
+def _load_in_order(db: Session, product_ids: List[int], fields: Optional[Tuple[str, ...]] = None) -> List[ProductOut]:
+    products_by_id = get_cached_products(db, product_ids, fields)
+    return [products_by_id[product_id] for product_id in product_ids if product_id in products_by_id]
 
 
 def create_product(db: Session, product: ProductCreate) -> Product:
@@ -40,6 +295,7 @@ def create_product(db: Session, product: ProductCreate) -> Product:
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    notify_products_changed([db_product])
     return db_product
 
 
@@ -54,4 +310,64 @@ def update_product(db: Session, product_id: int, product_update: ProductUpdate)
     
     db.commit()
     db.refresh(db_product)
+    notify_products_changed([db_product])
     return db_product
+
+
+def notify_products_changed(products: List[Product]):
+    products = [ProductOut.model_validate(product) for product in products]
+    for product in products:
+        product_cache.invalidate_tag(("product", product.id))
+        product_cache.set(product.id, product, tags=[("product", product.id)])
+    catalog.update(products)
+    search_index.update(products)
+    trigram_index.update(products)
+    suggester.update(products)
+    catalog_version.bump()
+    recommender.invalidate_products(p.id for p in products if p.stock <= 0)
+
+
+def popularity_version(db: Session) -> str:
+    popularity = recommender.popularity.ensure_fresh(db)
+    return recommender.model_version or str(popularity.built_at)
+
+
+def install_product_indexes(engine: Engine):
+    for index in Product.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
+
+def sync_catalog(db: Session) -> str:
+    last_id, last_updated_at = db.query(func.max(Product.id), func.max(Product.updated_at)).one()
+    state = f"{last_id or 0}.{_version(last_updated_at)}"
+    if state != _catalog_sync["state"]:
+        with _catalog_sync_lock:
+            if state != _catalog_sync["state"]:
+                _apply_catalog_changes(db)
+                _catalog_sync.update(state=state, id=last_id or 0, updated_at=last_updated_at)
+    return state
+
+
+def _apply_catalog_changes(db: Session):
+    if _catalog_sync["state"] is None:
+        notify_catalog_reloaded()
+        return
+    changed = Product.id > _catalog_sync["id"]
+    if _catalog_sync["updated_at"] is not None:
+        since = _catalog_sync["updated_at"] - timedelta(seconds=settings.CATALOG_SYNC_CLOCK_SKEW_SECONDS)
+        changed = or_(changed, Product.updated_at >= since)
+    products = db.query(Product).filter(changed).limit(settings.CATALOG_SYNC_MAX_CHANGES + 1).all()
+    if len(products) > settings.CATALOG_SYNC_MAX_CHANGES:
+        notify_catalog_reloaded()
+    elif products:
+        notify_products_changed(products)
+
+
+def notify_catalog_reloaded():
+    product_cache.clear()
+    catalog.invalidate()
+    search_index.invalidate()
+    trigram_index.invalidate()
+    suggester.invalidate()
+    recommender.cache.clear()
+    catalog_version.bump()
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from typing import Iterator
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.product import Product
+
+EXPORT_COLUMNS = (
+    "id", "slug", "name", "category", "description", "price", "stock",
+    "image_url", "attributes", "created_at", "updated_at"
+)
+
+
+def iter_product_batches(batch_size: int = settings.PRODUCT_EXPORT_BATCH_SIZE) -> Iterator[list]:
+    db = SessionLocal()
+    try:
+        statement = (
+            select(*(getattr(Product, column) for column in EXPORT_COLUMNS))
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in db.execute(statement).partitions():
+            yield rows
+    finally:
+        db.close()
+
+
+def _record(row) -> dict:
+    record = row._asdict()
+    record["created_at"] = record["created_at"].isoformat() if record["created_at"] else None
+    record["updated_at"] = record["updated_at"].isoformat() if record["updated_at"] else None
+    return record
+
+
+def export_ndjson(batch_size: int = settings.PRODUCT_EXPORT_BATCH_SIZE) -> Iterator[str]:
+    for rows in iter_product_batches(batch_size):
+        yield "".join(json.dumps(_record(row), ensure_ascii=False) + "\n" for row in rows)
+
+
+def export_csv(batch_size: int = settings.PRODUCT_EXPORT_BATCH_SIZE) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for rows in iter_product_batches(batch_size):
+        for row in rows:
+            record = _record(row)
+            record["attributes"] = json.dumps(record["attributes"]) if record["attributes"] else ""
+            writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORTERS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv; charset=utf-8"),
+}
@@ -0,0 +1,115 @@
+import csv
+import json
+from datetime import datetime
+from typing import Any, Dict, IO, Iterable, Iterator, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import product as crud_product
+from app.db.upsert import upsert
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+
+UPDATE_COLUMNS = ("name", "category", "description", "price", "stock", "image_url", "attributes", "updated_at")
+
+Row = Tuple[int, Union[Dict[str, Any], ValueError]]
+
+
+def read_ndjson(stream: IO[str]) -> Iterator[Row]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Expected a JSON object")
+            continue
+        yield line_number, row
+
+
+def read_csv(stream: IO[str]) -> Iterator[Row]:
+    for line_number, row in enumerate(csv.DictReader(stream), start=2):
+        row = {key: value for key, value in row.items() if key and value not in ("", None)}
+        if "attributes" in row:
+            try:
+                row["attributes"] = json.loads(row["attributes"])
+            except ValueError as e:
+                yield line_number, ValueError(f"Invalid attributes JSON: {e}")
+                continue
+        yield line_number, row
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+def import_products(db: Session, rows: Iterable[Row], batch_size: int = settings.PRODUCT_IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    report = {"processed": 0, "upserted": 0, "failed": 0, "errors": []}
+    batch: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    for line_number, row in rows:
+        report["processed"] += 1
+        if isinstance(row, ValueError):
+            _record_error(report, line_number, None, str(row))
+            continue
+        try:
+            product = ProductCreate.model_validate(row)
+        except ValidationError as e:
+            _record_error(report, line_number, row.get("slug"), _describe(e))
+            continue
+
+        values = product.model_dump()
+        values["attributes"] = values["attributes"] or {}
+        if product.slug in batch:
+            _record_error(report, batch[product.slug][0], product.slug, f"Superseded by row {line_number} with the same slug")
+        batch[product.slug] = (line_number, values)
+        if len(batch) >= batch_size:
+            _flush(db, batch, report)
+            batch = {}
+
+    if batch:
+        _flush(db, batch, report)
+    if report["upserted"]:
+        crud_product.notify_catalog_reloaded()
+    return report
+
+
+def _flush(db: Session, batch: Dict[str, Tuple[int, Dict[str, Any]]], report: Dict[str, Any]):
+    now = datetime.utcnow()
+    rows = [dict(values, created_at=now, updated_at=now) for _, values in batch.values()]
+    try:
+        upsert(db, Product, rows, ["slug"], UPDATE_COLUMNS)
+        db.commit()
+        report["upserted"] += len(rows)
+        return
+    except SQLAlchemyError:
+        db.rollback()
+
+    for (line_number, values), row in zip(batch.values(), rows):
+        try:
+            upsert(db, Product, [row], ["slug"], UPDATE_COLUMNS)
+            db.commit()
+            report["upserted"] += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            _record_error(report, line_number, values["slug"], str(getattr(e, "orig", None) or e))
+
+
+def _record_error(report: Dict[str, Any], line_number: int, slug, message: str):
+    report["failed"] += 1
+    if len(report["errors"]) < settings.PRODUCT_IMPORT_MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": line_number, "slug": slug, "error": message})
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
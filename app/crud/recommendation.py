@@ -0,0 +1,116 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.upsert import dialect_insert
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.recommendation import UserAffinityProfile
+from app.models.user import User
+from itertools import groupby
+from typing import Dict, Iterable
+
+
+def build_profile(db: Session, user_id: int) -> UserAffinityProfile:
+    return build_profiles(db, [user_id])[user_id]
+
+
+def build_profiles(db: Session, user_ids: Iterable[int]) -> Dict[int, UserAffinityProfile]:
+    user_ids = list(user_ids)
+    history = db.query(Order.user_id, OrderItem.product_id, Product.category).join(
+        OrderItem, Order.id == OrderItem.order_id
+    ).join(
+        Product, Product.id == OrderItem.product_id
+    ).filter(Order.user_id.in_(user_ids)).order_by(Order.user_id).all()
+    
+    profiles = {
+        user_id: UserAffinityProfile(user_id=user_id, category_counts={}, purchased_product_ids=[])
+        for user_id in user_ids
+    }
+    for user_id, rows in groupby(history, key=lambda row: row.user_id):
+        add_purchases(profiles[user_id], ((row.product_id, row.category) for row in rows))
+    return profiles
+
+
+def get_or_create_profile(db: Session, user_id: int) -> UserAffinityProfile:
+    profile = db.get(UserAffinityProfile, user_id)
+    if profile:
+        return profile
+    
+    profile = build_profile(db, user_id)
+    if not save_profiles(db, [profile]):
+        return db.get(UserAffinityProfile, user_id)
+    return profile
+
+
+def get_or_create_profiles(db: Session, user_ids: Iterable[int]) -> Dict[int, UserAffinityProfile]:
+    user_ids = set(user_ids)
+    profiles = {
+        profile.user_id: profile
+        for profile in db.query(UserAffinityProfile).filter(UserAffinityProfile.user_id.in_(user_ids))
+    }
+    
+    missing = user_ids - set(profiles)
+    if missing:
+        existing_users = [user_id for (user_id,) in db.query(User.id).filter(User.id.in_(missing))]
+        built = build_profiles(db, existing_users)
+        if not save_profiles(db, built.values()):
+            return {
+                profile.user_id: profile
+                for profile in db.query(UserAffinityProfile).filter(UserAffinityProfile.user_id.in_(user_ids))
+            }
+        profiles.update(built)
+    
+    return profiles
+
+
+def save_profiles(db: Session, profiles: Iterable[UserAffinityProfile]) -> bool:
+    rows = [
+        {
+            "user_id": profile.user_id,
+            "category_counts": profile.category_counts,
+            "purchased_product_ids": profile.purchased_product_ids
+        }
+        for profile in profiles
+    ]
+    if not rows:
+        return True
+    try:
+        db.execute(insert(UserAffinityProfile), rows)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def add_purchases(profile: UserAffinityProfile, purchases: Iterable[tuple[int, str]]):
+    category_counts = dict(profile.category_counts or {})
+    purchased_product_ids = set(profile.purchased_product_ids or [])
+    
+    for product_id, category in purchases:
+        purchased_product_ids.add(product_id)
+        category_counts[category] = category_counts.get(category, 0) + 1
+    
+    profile.category_counts = category_counts
+    profile.purchased_product_ids = sorted(purchased_product_ids)
+
+
+def record_purchases(db: Session, user_id: int, purchases: Iterable[tuple[int, str]]):
+    profile = _lock_profile(db, user_id)
+    if not profile:
+        built = build_profile(db, user_id)
+        statement = dialect_insert(db, UserAffinityProfile).values(
+            user_id=user_id,
+            category_counts=built.category_counts,
+            purchased_product_ids=built.purchased_product_ids
+        )
+        db.execute(statement.on_conflict_do_nothing(index_elements=["user_id"]))
+        profile = _lock_profile(db, user_id)
+    
+    add_purchases(profile, purchases)
+
+
+def _lock_profile(db: Session, user_id: int) -> UserAffinityProfile:
+    return db.query(UserAffinityProfile).filter(
+        UserAffinityProfile.user_id == user_id
+    ).with_for_update().first()
@@ -0,0 +1,31 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    if dialect not in INSERTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return INSERTS[dialect](model)
+
+
+def upsert(
+    db: Session,
+    model,
+    rows: List[Dict[str, Any]],
+    index_elements: Sequence[str],
+    update_columns: Sequence[str]
+):
+    statement = dialect_insert(db, model)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+    db.execute(statement, rows)
@@ -1,17 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db.session import engine, Base
 from app.api.v1 import auth, users, products, cart, orders, recommend, search
+from app.ml.impressions import impressions
+from app.ml.retrain import start_scheduler, shutdown_scheduler
+from app.search.backends import search_backend
+from app.crud.cart import install_cart_item_index
+from app.crud.product import install_product_indexes
 
 Base.metadata.create_all(bind=engine)
+search_backend.install(engine)
+install_product_indexes(engine)
+install_cart_item_index(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    impressions.start()
+    start_scheduler()
+    yield
+    shutdown_scheduler()
+    impressions.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -242,7 +262,7 @@ def list_all_endpoints():
                     "notes": "Uses collaborative filtering and category affinity"
                 },
                 "POST /api/v1/recommend/retrain": {
-                    "description": "Retrain ML model (Admin only)",
+                    "description": "Start a retrain in the background and return the current model version (Admin only)",
                     "auth": "Admin role required"
                 }
             }
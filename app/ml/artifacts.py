@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+CURRENT = "CURRENT"
+METADATA = "metadata.json"
+
+
+class ModelStore:
+    def __init__(self, root: str, keep: int = 3):
+        self.root = Path(root)
+        self.keep = keep
+
+    def current_version(self) -> Optional[str]:
+        try:
+            version = (self.root / CURRENT).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version if (self.root / version).is_dir() else None
+
+    def publish(self, models: Dict[str, Dict[str, np.ndarray]], metadata: Optional[Dict[str, Any]] = None) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        staging = self.root / f".staging-{version}-{os.getpid()}"
+        staging.mkdir()
+
+        for model, arrays in models.items():
+            for name, array in arrays.items():
+                np.save(staging / f"{model}.{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+        (staging / METADATA).write_text(json.dumps({"version": version, **(metadata or {})}))
+
+        os.rename(staging, self.root / version)
+        pointer = self.root / f".{CURRENT}-{os.getpid()}"
+        pointer.write_text(version)
+        os.replace(pointer, self.root / CURRENT)
+
+        self._prune(version)
+        return version
+
+    def load(self, version: str) -> Dict[str, Dict[str, np.ndarray]]:
+        models: Dict[str, Dict[str, np.ndarray]] = {}
+        for path in (self.root / version).glob("*.npy"):
+            model, name = path.stem.split(".", 1)
+            models.setdefault(model, {})[name] = np.load(path, mmap_mode="r", allow_pickle=False)
+        return models
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        return json.loads((self.root / version / METADATA).read_text())
+
+    def _prune(self, current: str):
+        versions = sorted(
+            path.name for path in self.root.iterdir()
+            if path.is_dir() and not path.name.startswith(".") and path.name != current
+        )
+        for version in versions[:max(0, len(versions) - self.keep + 1)]:
+            shutil.rmtree(self.root / version, ignore_errors=True)
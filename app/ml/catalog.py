@@ -0,0 +1,178 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.refresh import RefreshableIndex
+from app.models.product import Product
+
+
+def lookup_positions(sorted_ids: np.ndarray, wanted: Iterable[int]) -> np.ndarray:
+    if not isinstance(wanted, np.ndarray):
+        wanted = np.fromiter(wanted, dtype=np.int64)
+    if wanted.size == 0 or sorted_ids.size == 0:
+        return np.empty(0, dtype=np.int64)
+    positions = np.searchsorted(sorted_ids, wanted)
+    positions = np.clip(positions, 0, sorted_ids.size - 1)
+    return positions[sorted_ids[positions] == wanted]
+
+
+class CatalogSnapshot(RefreshableIndex):
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.category_codes = np.empty(0, dtype=np.int32)
+        self.categories: List[str] = []
+        self.in_stock = np.empty(0, dtype=bool)
+        self.price = np.empty(0, dtype=np.float32)
+        self.structure = 0
+
+    def __len__(self) -> int:
+        return self.product_ids.size
+
+    def _build(self, db: Session) -> "CatalogSnapshot":
+        rows = db.execute(
+            select(Product.id, Product.category, Product.stock, Product.price).order_by(Product.id)
+        ).all()
+
+        categories = sorted({row.category for row in rows})
+        codes = {category: code for code, category in enumerate(categories)}
+
+        fresh = CatalogSnapshot(self.ttl_seconds)
+        fresh.product_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        fresh.category_codes = np.fromiter((codes[row.category] for row in rows), dtype=np.int32, count=len(rows))
+        fresh.in_stock = np.fromiter((row.stock > 0 for row in rows), dtype=bool, count=len(rows))
+        fresh.price = np.fromiter((row.price for row in rows), dtype=np.float32, count=len(rows))
+        fresh.categories = categories
+        return fresh
+
+    def _swap(self, fresh: "CatalogSnapshot"):
+        if not (
+            fresh.categories == self.categories
+            and np.array_equal(fresh.product_ids, self.product_ids)
+            and np.array_equal(fresh.category_codes, self.category_codes)
+        ):
+            self.structure += 1
+        self.product_ids = fresh.product_ids
+        self.category_codes = fresh.category_codes
+        self.in_stock = fresh.in_stock
+        self.price = fresh.price
+        self.categories = fresh.categories
+
+    def _same_content(self, fresh: "CatalogSnapshot") -> bool:
+        return (
+            fresh.categories == self.categories
+            and np.array_equal(fresh.product_ids, self.product_ids)
+            and np.array_equal(fresh.category_codes, self.category_codes)
+            and np.array_equal(fresh.in_stock, self.in_stock)
+            and np.array_equal(fresh.price, self.price)
+        )
+
+    def _apply(self, products: Iterable[Product]):
+        codes = {category: code for code, category in enumerate(self.categories)}
+        for product in products:
+            positions = self.positions([product.id])
+            if positions.size == 0 or product.category not in codes:
+                self.built_at = None
+                return
+            position = positions[0]
+            if self.category_codes[position] != codes[product.category]:
+                self.category_codes[position] = codes[product.category]
+                self.structure += 1
+            self.in_stock[position] = product.stock > 0
+            self.price[position] = product.price
+
+    def positions(self, product_ids: Iterable[int]) -> np.ndarray:
+        return lookup_positions(self.product_ids, product_ids)
+
+    def ranking(self, product_ids: np.ndarray, weights: np.ndarray) -> "Ranking":
+        with self._lock:
+            return Ranking(self, product_ids, weights)
+
+    def scatter(self, product_ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+        dense = np.zeros(self.product_ids.size, dtype=np.float64)
+        if product_ids.size == 0 or self.product_ids.size == 0:
+            return dense
+        positions = np.clip(np.searchsorted(self.product_ids, product_ids), 0, self.product_ids.size - 1)
+        found = self.product_ids[positions] == product_ids
+        dense[positions[found]] = values[found]
+        return dense
+
+    def count(self, category: Optional[str] = None) -> int:
+        if category is None:
+            return int(self.product_ids.size)
+        codes = self.category_codes_for([category])
+        return int(np.count_nonzero(self.category_codes == codes[0])) if codes.size else 0
+
+    def category_codes_for(self, names: Iterable[str]) -> np.ndarray:
+        codes = {category: code for code, category in enumerate(self.categories)}
+        return np.array([codes[name] for name in names if name in codes], dtype=np.int32)
+
+
+class Ranking:
+    def __init__(self, snapshot: CatalogSnapshot, product_ids: np.ndarray, weights: np.ndarray):
+        self.structure = snapshot.structure
+        self.categories = {category: code for code, category in enumerate(snapshot.categories)}
+        scores = snapshot.scatter(product_ids, weights)
+        order = np.lexsort((snapshot.product_ids, -scores))
+        self.product_ids = snapshot.product_ids[order]
+        self.scores = scores[order]
+
+        codes = snapshot.category_codes[order]
+        grouped = np.argsort(codes, kind="stable")
+        self.category_ids = self.product_ids[grouped]
+        self.category_scores = self.scores[grouped]
+        self.category_starts = np.searchsorted(codes[grouped], np.arange(len(snapshot.categories) + 1))
+
+    def page(self, category: Optional[str], skip: int, limit: int) -> Tuple[List[int], int]:
+        if category is None:
+            product_ids = self.product_ids
+        elif category in self.categories:
+            code = self.categories[category]
+            product_ids = self.category_ids[self.category_starts[code]:self.category_starts[code + 1]]
+        else:
+            return [], 0
+        return product_ids[skip:skip + limit].tolist(), int(product_ids.size)
+
+    def promote(self, product_id: int, score: float):
+        promote(self.product_ids, self.scores, product_id, score, 0, self.product_ids.size)
+        position = np.flatnonzero(self.category_ids == product_id)
+        if position.size:
+            code = np.searchsorted(self.category_starts, position[0], side="right") - 1
+            promote(
+                self.category_ids, self.category_scores, product_id, score,
+                self.category_starts[code], self.category_starts[code + 1]
+            )
+
+    def rescale(self, factor: float):
+        self.scores *= factor
+        self.category_scores *= factor
+
+
+def promote(product_ids: np.ndarray, scores: np.ndarray, product_id: int, score: float, start: int, stop: int):
+    found = np.flatnonzero(product_ids[start:stop] == product_id)
+    if found.size == 0:
+        return
+    old = start + found[0]
+    ahead = -scores[start:old]
+    low = start + np.searchsorted(ahead, -score, side="left")
+    high = start + np.searchsorted(ahead, -score, side="right")
+    new = low + np.searchsorted(product_ids[low:high], product_id)
+    product_ids[new + 1:old + 1] = product_ids[new:old].copy()
+    scores[new + 1:old + 1] = scores[new:old].copy()
+    product_ids[new] = product_id
+    scores[new] = score
+
+
+def top_k(scores: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    if candidates.size == 0 or k <= 0:
+        return candidates[:0]
+    if candidates.size > k:
+        best = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[best]
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+catalog = CatalogSnapshot(ttl_seconds=settings.CATALOG_SNAPSHOT_TTL_SECONDS)
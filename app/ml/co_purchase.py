@@ -0,0 +1,86 @@
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.refresh import RefreshableIndex
+from app.ml.catalog import lookup_positions
+from app.models.order import OrderItem
+
+
+class CoPurchaseModel(RefreshableIndex):
+    bumps_catalog_version = False
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+
+    def fit(self, db: Session) -> "CoPurchaseModel":
+        return self.refresh(db)
+
+    def _build(self, db: Session) -> "CoPurchaseModel":
+        rows = db.execute(select(OrderItem.order_id, OrderItem.product_id)).all()
+        order_ids = np.fromiter((row.order_id for row in rows), dtype=np.int64, count=len(rows))
+        product_ids = np.fromiter((row.product_id for row in rows), dtype=np.int64, count=len(rows))
+        fresh = CoPurchaseModel(self.ttl_seconds)
+        fresh.product_ids, fresh.matrix = build_similarity(order_ids, product_ids)
+        return fresh
+
+    def _swap(self, fresh: "CoPurchaseModel"):
+        self.product_ids = fresh.product_ids
+        self.matrix = fresh.matrix
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "product_ids": self.product_ids,
+            "data": self.matrix.data,
+            "indices": self.matrix.indices,
+            "indptr": self.matrix.indptr,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CoPurchaseModel":
+        model = cls()
+        model.product_ids = arrays["product_ids"]
+        size = model.product_ids.size
+        model.matrix = sparse.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]), shape=(size, size), copy=False
+        )
+        model.built_at = time.monotonic()
+        return model
+
+    def similar_to(self, product_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        rows = lookup_positions(self.product_ids, product_ids)
+        if rows.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        neighbours = self.matrix[rows]
+        columns, inverse = np.unique(neighbours.indices, return_inverse=True)
+        scores = np.bincount(inverse, weights=neighbours.data, minlength=columns.size)
+        return self.product_ids[columns], scores
+
+
+def build_similarity(order_ids: np.ndarray, product_ids: np.ndarray):
+    products, columns = np.unique(product_ids, return_inverse=True)
+    _, rows = np.unique(order_ids, return_inverse=True)
+    if products.size == 0:
+        return products, sparse.csr_matrix((0, 0), dtype=np.float32)
+
+    baskets = sparse.csr_matrix(
+        (np.ones(rows.size, dtype=np.float32), (rows, columns)),
+        shape=(int(rows.max()) + 1, products.size),
+    )
+    baskets.data[:] = 1.0
+
+    counts = (baskets.T @ baskets).tocsr()
+    norms = np.sqrt(counts.diagonal())
+    counts.setdiag(0)
+    counts.eliminate_zeros()
+
+    inverse_norms = sparse.diags(1.0 / np.maximum(norms, 1.0)).astype(np.float32)
+    similarity = (inverse_norms @ counts @ inverse_norms).tocsr().astype(np.float32)
+    similarity.sort_indices()
+    return products, similarity
@@ -0,0 +1,125 @@
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.refresh import RefreshableIndex
+from app.ml.catalog import lookup_positions
+from app.models.product import Product
+
+
+def product_document(name: str, category: str, description: Optional[str], attributes: Optional[Dict[str, Any]]) -> str:
+    parts = [name, name, category, description or ""]
+    for key, value in (attributes or {}).items():
+        if value is True:
+            parts.append(key)
+        elif value not in (None, False, ""):
+            parts.append(f"{key} {value}")
+    return " ".join(parts)
+
+
+class ContentIndex(RefreshableIndex):
+    bumps_catalog_version = False
+    blocking_first_build = False
+
+    def __init__(self, n_neighbours: int = 20, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.n_neighbours = n_neighbours
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.neighbours = np.empty((0, n_neighbours), dtype=np.int64)
+        self.scores = np.empty((0, n_neighbours), dtype=np.float32)
+        self.centrality = np.empty(0, dtype=np.float32)
+
+    def fit(self, db: Session) -> "ContentIndex":
+        return self.refresh(db)
+
+    def _build(self, db: Session) -> "ContentIndex":
+        rows = db.execute(
+            select(Product.id, Product.name, Product.category, Product.description, Product.attributes)
+            .order_by(Product.id)
+        ).all()
+        product_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        documents = [product_document(row.name, row.category, row.description, row.attributes) for row in rows]
+
+        fresh = ContentIndex(self.n_neighbours, self.ttl_seconds)
+        fresh.neighbours, fresh.scores = build_neighbours(documents, product_ids, self.n_neighbours)
+        fresh.product_ids = product_ids
+        fresh.centrality = centrality(product_ids, fresh.neighbours, fresh.scores)
+        return fresh
+
+    def _swap(self, fresh: "ContentIndex"):
+        self.product_ids = fresh.product_ids
+        self.neighbours = fresh.neighbours
+        self.scores = fresh.scores
+        self.centrality = fresh.centrality
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "product_ids": self.product_ids,
+            "neighbours": self.neighbours,
+            "scores": self.scores,
+            "centrality": self.centrality,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "ContentIndex":
+        index = cls(n_neighbours=arrays["neighbours"].shape[1])
+        index.product_ids = arrays["product_ids"]
+        index.neighbours = arrays["neighbours"]
+        index.scores = arrays["scores"]
+        index.centrality = arrays["centrality"]
+        index.built_at = time.monotonic()
+        return index
+
+    def similar_to(self, product_ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        rows = lookup_positions(self.product_ids, product_ids)
+        if rows.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        neighbours = self.neighbours[rows].ravel()
+        scores = self.scores[rows].ravel()
+        found = neighbours >= 0
+        ids, inverse = np.unique(neighbours[found], return_inverse=True)
+        return ids, np.bincount(inverse, weights=scores[found], minlength=ids.size)
+
+
+def build_neighbours(documents, product_ids: np.ndarray, n_neighbours: int):
+    neighbours = np.full((len(documents), n_neighbours), -1, dtype=np.int64)
+    scores = np.zeros((len(documents), n_neighbours), dtype=np.float32)
+    if len(documents) < 2:
+        return neighbours, scores
+
+    try:
+        vectors = TfidfVectorizer(
+            stop_words="english", sublinear_tf=True, dtype=np.float32, max_df=settings.CONTENT_MAX_TERM_PRODUCTS
+        ).fit_transform(documents)
+    except ValueError:
+        return neighbours, scores
+
+    transposed = vectors.T.tocsr()
+    k = min(n_neighbours, len(documents) - 1)
+    for start in range(0, len(documents), 256):
+        stop = min(start + 256, len(documents))
+        similarity = (vectors[start:stop] @ transposed).tocoo()
+        rows, columns, values = similarity.row, similarity.col, similarity.data
+        keep = (columns != rows + start) & (values > 0)
+        rows, columns, values = rows[keep], columns[keep], values[keep]
+
+        order = np.lexsort((columns, -values, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        rank = np.arange(rows.size) - np.searchsorted(rows, rows)
+        best = rank < k
+
+        neighbours[start + rows[best], rank[best]] = product_ids[columns[best]]
+        scores[start + rows[best], rank[best]] = values[best]
+
+    return neighbours, scores
+
+
+def centrality(product_ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    found = neighbours >= 0
+    positions = lookup_positions(product_ids, neighbours[found])
+    return np.bincount(positions, weights=scores[found], minlength=product_ids.size).astype(np.float32)
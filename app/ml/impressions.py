@@ -0,0 +1,134 @@
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.recommendation import RecommendationLog
+
+logger = logging.getLogger(__name__)
+
+
+class ImpressionLogger:
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        high_watermark: float = 0.8,
+        sample_rate: float = 0.1,
+        session_factory=SessionLocal
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_watermark = int(max_queue_size * high_watermark)
+        self.sample_rate = sample_rate
+        self.session_factory = session_factory
+        self.enqueued = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def log(self, user_id: int, recommendations: List[Dict], context: Optional[Dict[str, Any]] = None):
+        if self._queue.qsize() >= self.high_watermark and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "recommended_products": recommendations,
+                "context": context or {},
+                "timestamp": datetime.utcnow()
+            })
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="impression-logger", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0 and not self._stop.is_set():
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                if not block or timeout <= 0 or self._stop.is_set():
+                    break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(RecommendationLog), batch)
+            db.commit()
+            self.written += len(batch)
+        except Exception:
+            db.rollback()
+            self.failed += len(batch)
+            logger.exception("Failed to write %d recommendation impressions", len(batch))
+        finally:
+            db.close()
+
+
+impressions = ImpressionLogger(
+    max_queue_size=settings.IMPRESSION_QUEUE_SIZE,
+    batch_size=settings.IMPRESSION_BATCH_SIZE,
+    flush_interval=settings.IMPRESSION_FLUSH_INTERVAL_SECONDS,
+    sample_rate=settings.IMPRESSION_SAMPLE_RATE_UNDER_PRESSURE
+)
@@ -0,0 +1,131 @@
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.refresh import RefreshableIndex
+from app.ml.catalog import CatalogSnapshot, Ranking, lookup_positions
+from app.models.order import Order, OrderItem
+
+
+class PopularityModel(RefreshableIndex):
+    bumps_catalog_version = False
+
+    def __init__(self, half_life_days: float = 7.0, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.half_life = timedelta(days=half_life_days).total_seconds()
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.reference_time = datetime.utcnow()
+        self.ranking: Optional[Ranking] = None
+
+    def fit(self, db: Session) -> "PopularityModel":
+        return self.refresh(db)
+
+    def _build(self, db: Session) -> "PopularityModel":
+        now = datetime.utcnow()
+        horizon = now - timedelta(seconds=self.half_life * 20)
+        rows = db.execute(
+            select(OrderItem.product_id, OrderItem.qty, Order.placed_at)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Order.placed_at >= horizon)
+        ).all()
+
+        product_ids = np.fromiter((row.product_id for row in rows), dtype=np.int64, count=len(rows))
+        qty = np.fromiter((row.qty for row in rows), dtype=np.float64, count=len(rows))
+        age = np.fromiter(((row.placed_at - now).total_seconds() for row in rows), dtype=np.float64, count=len(rows))
+
+        ids, inverse = np.unique(product_ids, return_inverse=True)
+        fresh = PopularityModel(ttl_seconds=self.ttl_seconds)
+        fresh.half_life = self.half_life
+        fresh.product_ids = ids
+        fresh.weights = np.bincount(inverse, weights=qty * np.exp2(age / self.half_life), minlength=ids.size)
+        fresh.reference_time = now
+        return fresh
+
+    def _swap(self, fresh: "PopularityModel"):
+        self.product_ids = fresh.product_ids
+        self.weights = fresh.weights
+        self.reference_time = fresh.reference_time
+        self.ranking = None
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {
+                "product_ids": self.product_ids,
+                "weights": self.weights,
+                "reference_time": np.array([self.reference_time.replace(tzinfo=timezone.utc).timestamp()]),
+                "half_life": np.array([self.half_life]),
+            }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "PopularityModel":
+        model = cls()
+        model.half_life = float(arrays["half_life"][0])
+        model.product_ids = np.array(arrays["product_ids"])
+        model.weights = np.array(arrays["weights"])
+        model.reference_time = datetime.fromtimestamp(float(arrays["reference_time"][0]), tz=timezone.utc).replace(tzinfo=None)
+        model.built_at = time.monotonic()
+        return model
+
+    def record(self, items: Iterable[Tuple[int, int]], placed_at: Optional[datetime] = None):
+        self.update((list(items), placed_at or datetime.utcnow()))
+
+    def _apply(self, change: Tuple[List[Tuple[int, int]], datetime]):
+        items, placed_at = change
+        exponent = (placed_at - self.reference_time).total_seconds() / self.half_life
+        if exponent > 32:
+            self.weights = self.weights * math.exp2(-exponent)
+            if self.ranking is not None:
+                self.ranking.rescale(math.exp2(-exponent))
+            self.reference_time = placed_at
+            exponent = 0.0
+
+        for product_id, qty in items:
+            positions = lookup_positions(self.product_ids, [product_id])
+            if positions.size:
+                position = positions[0]
+                self.weights[position] += qty * math.exp2(exponent)
+            else:
+                position = np.searchsorted(self.product_ids, product_id)
+                self.product_ids = np.insert(self.product_ids, position, product_id)
+                self.weights = np.insert(self.weights, position, qty * math.exp2(exponent))
+            if self.ranking is not None:
+                self.ranking.promote(product_id, self.weights[position])
+
+    def page(self, snapshot: CatalogSnapshot, category: Optional[str], skip: int, limit: int) -> Tuple[List[int], int]:
+        with self._lock:
+            if self.ranking is None or self.ranking.structure != snapshot.structure:
+                self.ranking = snapshot.ranking(self.product_ids, self.weights)
+            return self.ranking.page(category, skip, limit)
+
+    def scores_for(self, product_ids: np.ndarray) -> np.ndarray:
+        with self._lock:
+            known_ids, weights = self.product_ids, self.weights
+        scores = np.zeros(len(product_ids), dtype=np.float64)
+        if known_ids.size == 0 or weights.max() <= 0:
+            return scores
+        positions = np.clip(np.searchsorted(known_ids, product_ids), 0, known_ids.size - 1)
+        found = known_ids[positions] == product_ids
+        scores[found] = weights[positions[found]] / weights.max()
+        return scores
+
+    def log_weights_for(self, product_ids: np.ndarray) -> np.ndarray:
+        with self._lock:
+            known_ids, weights, reference_time = self.product_ids, self.weights, self.reference_time
+        logs = np.full(len(product_ids), -np.inf)
+        if known_ids.size == 0:
+            return logs
+        positions = np.clip(np.searchsorted(known_ids, product_ids), 0, known_ids.size - 1)
+        found = (known_ids[positions] == product_ids) & (weights[positions] > 0)
+        offset = reference_time.replace(tzinfo=timezone.utc).timestamp() / self.half_life
+        logs[found] = np.log2(weights[positions[found]]) + offset
+        return logs
+
+    def rank(self, product_ids: np.ndarray) -> np.ndarray:
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        return product_ids[np.lexsort((product_ids, -self.scores_for(product_ids)))]
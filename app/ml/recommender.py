@@ -1,59 +1,182 @@
 from sqlalchemy.orm import Session
-from app.models.order import Order, OrderItem
-from app.models.product import Product
-from typing import List, Dict, Optional
-import random
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.crud import recommendation as crud_recommendation
+from app.ml.artifacts import ModelStore
+from app.ml.catalog import CatalogSnapshot, catalog, top_k
+from app.ml.co_purchase import CoPurchaseModel
+from app.ml.content import ContentIndex
+from app.ml.popularity import PopularityModel
+from app.models.recommendation import UserAffinityProfile
+from datetime import datetime
+from typing import Any, Iterable, List, Dict, Optional, Tuple
+import numpy as np
+import time
 
 
 class RecommendationEngine:
     def __init__(self):
-        pass
-    
+        self.catalog = catalog
+        self.co_purchase = CoPurchaseModel(ttl_seconds=settings.RECOMMENDER_MODEL_TTL_SECONDS)
+        self.content = ContentIndex(
+            n_neighbours=settings.CONTENT_NEIGHBOURS,
+            ttl_seconds=settings.RECOMMENDER_MODEL_TTL_SECONDS
+        )
+        self.popularity = PopularityModel(
+            half_life_days=settings.POPULARITY_HALF_LIFE_DAYS,
+            ttl_seconds=settings.RECOMMENDER_MODEL_TTL_SECONDS
+        )
+        self.cache = LRUCache(
+            maxsize=settings.RECOMMENDATION_CACHE_SIZE,
+            ttl_seconds=settings.RECOMMENDATION_CACHE_TTL_SECONDS
+        )
+        self.model_store = ModelStore(settings.RECOMMENDER_ARTIFACT_DIR, keep=settings.RECOMMENDER_ARTIFACT_KEEP)
+        self.model_version: Optional[str] = None
+        self._artifacts_checked_at = float("-inf")
+
     def get_recommendations(
-        self, 
-        db: Session, 
-        user_id: int, 
+        self,
+        db: Session,
+        user_id: int,
         limit: int = 10,
-        context: Optional[str] = "homepage"
+        context: Optional[str] = "homepage",
+        product_id: Optional[int] = None,
+        use_cache: bool = True
     ) -> List[Dict]:
-        user_orders = db.query(Order).filter(Order.user_id == user_id).all()
-        
-        purchased_product_ids = set()
-        for order in user_orders:
-            for item in order.items:
-                purchased_product_ids.add(item.product_id)
-        
-        all_products = db.query(Product).filter(Product.stock > 0).all()
-        
-        if not user_orders:
-            recommended = random.sample(all_products, min(limit, len(all_products)))
-            return [
-                {"product_id": p.id, "score": 0.5 + random.random() * 0.5}
-                for p in recommended
-            ]
-        
-        category_counts = {}
-        for order in user_orders:
-            for item in order.items:
-                product = db.query(Product).filter(Product.id == item.product_id).first()
-                if product:
-                    category_counts[product.category] = category_counts.get(product.category, 0) + 1
-        
-        favorite_categories = sorted(category_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+        if context != "product":
+            product_id = None
+
+        key = (user_id, context, product_id, limit)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if product_id is not None:
+            recommendations = self._similar_products(db, product_id, limit)
+        else:
+            recommendations = self._score(db, user_id, limit)
+
+        self.cache.set(key, recommendations, tags=[("user", user_id)] + [
+            ("product", item["product_id"]) for item in recommendations
+        ])
+        return recommendations
+
+    def invalidate_user(self, user_id: int):
+        self.cache.invalidate_tag(("user", user_id))
+
+    def invalidate_products(self, product_ids: Iterable[int]):
+        for product_id in product_ids:
+            self.cache.invalidate_tag(("product", product_id))
+
+    def get_batch_recommendations(
+        self,
+        db: Session,
+        user_ids: Iterable[int],
+        limit: int = 10,
+        context: Optional[str] = "homepage"
+    ) -> Dict[int, List[Dict]]:
+        snapshot = self._prepare(db)
+        profiles = crud_recommendation.get_or_create_profiles(db, user_ids)
+
+        return {
+            user_id: self._rank(snapshot, profile, limit)
+            for user_id, profile in profiles.items()
+        }
+
+    def record_order(self, items: Iterable[Tuple[int, int]], placed_at: Optional[datetime] = None):
+        self.popularity.record(items, placed_at)
+
+    def model_arrays(self) -> Dict[str, Dict[str, np.ndarray]]:
+        return {
+            "co_purchase": self.co_purchase.to_arrays(),
+            "content": self.content.to_arrays(),
+            "popularity": self.popularity.to_arrays(),
+        }
+
+    def model_info(self) -> Dict[str, Any]:
+        info = {"version": self.model_version, "source": "artifacts" if self.model_version else "in-process"}
+        if self.model_version:
+            info["metadata"] = self.model_store.metadata(self.model_version)
+        return info
+
+    def sync_artifacts(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._artifacts_checked_at < settings.RECOMMENDER_ARTIFACT_POLL_SECONDS:
+            return
+        self._artifacts_checked_at = now
+        version = self.model_store.current_version()
+        if version and version != self.model_version:
+            self.load_version(version)
+
+    def load_version(self, version: str):
+        models = self.model_store.load(version)
+        co_purchase = CoPurchaseModel.from_arrays(models["co_purchase"])
+        content = ContentIndex.from_arrays(models["content"])
+        popularity = PopularityModel.from_arrays(models["popularity"])
+
+        self.co_purchase, self.content, self.popularity = co_purchase, content, popularity
+        self.model_version = version
+        self.cache.clear()
+
+    def _prepare(self, db: Session) -> CatalogSnapshot:
+        self.sync_artifacts()
+        self.co_purchase.ensure_fresh(db)
+        self.content.ensure_fresh(db)
+        self.popularity.ensure_fresh(db)
+        return self.catalog.ensure_fresh(db)
+
+    def _score(self, db: Session, user_id: int, limit: int) -> List[Dict]:
+        snapshot = self._prepare(db)
+        profile = crud_recommendation.get_or_create_profile(db, user_id)
+
+        return self._rank(snapshot, profile, limit)
+
+    def _similar_products(self, db: Session, product_id: int, limit: int) -> List[Dict]:
+        snapshot = self._prepare(db)
+
+        scores = 0.4 * self.popularity.scores_for(snapshot.product_ids)
+        similar_ids, similarity = self.content.similar_to([product_id])
+        if similar_ids.size:
+            similar = snapshot.scatter(similar_ids, similarity / similarity.max())
+            scores = np.where(similar > 0, 0.5 + 0.5 * similar, scores)
+
+        eligible = snapshot.in_stock.copy()
+        eligible[snapshot.positions([product_id])] = False
+
+        return self._top(snapshot, scores, eligible, limit)
+
+    def _rank(self, snapshot: CatalogSnapshot, profile: UserAffinityProfile, limit: int) -> List[Dict]:
+        popularity = self.popularity.scores_for(snapshot.product_ids)
+
+        if not profile.purchased_product_ids:
+            scores = 0.5 + 0.3 * popularity
+            centrality = self.content.centrality
+            if centrality.size and centrality.max() > 0:
+                scores += 0.2 * snapshot.scatter(self.content.product_ids, centrality / centrality.max())
+            return self._top(snapshot, scores, snapshot.in_stock, limit)
+
+        favorite_categories = sorted(profile.category_counts.items(), key=lambda x: x[1], reverse=True)[:3]
         favorite_category_names = [cat for cat, _ in favorite_categories]
-        
-        candidates = []
-        for product in all_products:
-            if product.id not in purchased_product_ids:
-                score = 0.3
-                if product.category in favorite_category_names:
-                    score += 0.5
-                score += random.random() * 0.2
-                candidates.append({"product_id": product.id, "score": score})
-        
-        candidates.sort(key=lambda x: x["score"], reverse=True)
-        
-        return candidates[:limit]
+
+        scores = 0.2 + 0.1 * popularity
+        scores += 0.2 * np.isin(snapshot.category_codes, snapshot.category_codes_for(favorite_category_names))
+
+        similar_ids, similarity = self.co_purchase.similar_to(profile.purchased_product_ids)
+        if similar_ids.size:
+            scores += 0.5 * snapshot.scatter(similar_ids, similarity / similarity.max())
+
+        eligible = snapshot.in_stock.copy()
+        eligible[snapshot.positions(profile.purchased_product_ids)] = False
+
+        return self._top(snapshot, scores, eligible, limit)
+
+    def _top(self, snapshot: CatalogSnapshot, scores: np.ndarray, eligible: np.ndarray, limit: int) -> List[Dict]:
+        best = top_k(scores, np.flatnonzero(eligible), limit)
+        return [
+            {"product_id": int(snapshot.product_ids[position]), "score": float(scores[position])}
+            for position in best
+        ]
 
 
 recommender = RecommendationEngine()
@@ -0,0 +1,129 @@
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.ml.co_purchase import CoPurchaseModel
+from app.ml.content import ContentIndex
+from app.ml.popularity import PopularityModel
+from app.ml.recommender import recommender
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+scheduler: Optional[BackgroundScheduler] = None
+_leader_lock_file = None
+_retrain_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def retrain(session_factory=SessionLocal) -> str:
+    with _retrain_lock, _file_lock(recommender.model_store.root / "retrain.lock"):
+        db = session_factory()
+        try:
+            co_purchase = CoPurchaseModel().fit(db)
+            content = ContentIndex(n_neighbours=settings.CONTENT_NEIGHBOURS).fit(db)
+            popularity = PopularityModel(half_life_days=settings.POPULARITY_HALF_LIFE_DAYS).fit(db)
+        finally:
+            db.close()
+
+        version = recommender.model_store.publish(
+            {
+                "co_purchase": co_purchase.to_arrays(),
+                "content": content.to_arrays(),
+                "popularity": popularity.to_arrays(),
+            },
+            metadata={
+                "trained_at": datetime.utcnow().isoformat(),
+                "co_purchase_products": int(co_purchase.product_ids.size),
+                "co_purchase_pairs": int(co_purchase.matrix.nnz),
+                "content_products": int(content.product_ids.size),
+                "popular_products": int(popularity.product_ids.size),
+            }
+        )
+
+    recommender.load_version(version)
+    logger.info("Published recommender model version %s", version)
+    return version
+
+
+def request_retrain():
+    if scheduler is not None:
+        scheduler.modify_job("recommender-retrain", next_run_time=datetime.now())
+    elif not _retrain_lock.locked():
+        threading.Thread(target=_retrain_in_background, daemon=True).start()
+
+
+def _retrain_in_background():
+    try:
+        retrain()
+    except Exception:
+        logger.exception("Recommender retrain failed")
+
+
+def _acquire_leadership() -> bool:
+    global _leader_lock_file
+    if fcntl is None:
+        return True
+    path = recommender.model_store.root / "scheduler.lock"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _leader_lock_file = lock_file
+    return True
+
+
+def start_scheduler():
+    global scheduler
+    if scheduler is not None or not settings.RECOMMENDER_RETRAIN_ENABLED:
+        return
+    if not _acquire_leadership():
+        return
+
+    scheduler = BackgroundScheduler(daemon=True)
+    scheduler.add_job(
+        retrain,
+        "interval",
+        minutes=settings.RECOMMENDER_RETRAIN_INTERVAL_MINUTES,
+        id="recommender-retrain",
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()
+    )
+    scheduler.start()
+
+
+def shutdown_scheduler():
+    global scheduler, _leader_lock_file
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+        scheduler = None
+    if _leader_lock_file is not None:
+        _leader_lock_file.close()
+        _leader_lock_file = None
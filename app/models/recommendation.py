@@ -11,3 +11,12 @@ class RecommendationLog(Base):
     recommended_products = Column(JSON, nullable=False)
     context = Column(JSON, default=dict)
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+class UserAffinityProfile(Base):
+    __tablename__ = "user_affinity_profiles"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category_counts = Column(JSON, nullable=False, default=dict)
+    purchased_product_ids = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
@@ -37,8 +37,65 @@ class ProductOut(ProductBase):
         from_attributes = True
 
 
+class CategoryFacet(BaseModel):
+    value: str
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    categories: List[CategoryFacet]
+    price: List[PriceBucket]
+    in_stock: int
+
+
 class ProductList(BaseModel):
     total: int
-    page: int
+    page: Optional[int] = None
     size: int
     items: list[ProductOut]
+    facets: Optional[ProductFacets] = None
+    next_cursor: Optional[str] = None
+
+
+class ProductBatch(BaseModel):
+    items: list[ProductOut]
+    missing_ids: List[int]
+    missing_slugs: List[str]
+
+
+class ProductSearchResult(BaseModel):
+    total: int
+    items: list[ProductOut]
+    facets: ProductFacets
+
+
+
+class SearchCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: Optional[float]
+    hits: int
+    misses: int
+    stale: int
+    evictions: int
+    hit_rate: float
+    catalog_version: int
+
+
+class ProductImportError(BaseModel):
+    row: int
+    slug: Optional[str] = None
+    error: str
+
+
+class ProductImportReport(BaseModel):
+    processed: int
+    upserted: int
+    failed: int
+    errors: List[ProductImportError]
@@ -1,12 +1,52 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from app.schemas.product import ProductOut
 
 
 class RecommendationItem(BaseModel):
     product_id: int
     score: float
+    product: Optional[ProductOut] = None
 
 
 class RecommendationResponse(BaseModel):
     user_id: int
     recommendations: List[RecommendationItem]
+
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=1000)
+    context: Optional[str] = "homepage"
+    limit: int = Field(10, ge=1, le=50)
+    include: Optional[str] = Field(None, pattern="^product$")
+
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[RecommendationResponse]
+    unknown_user_ids: List[int]
+
+
+class RecommendationCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: Optional[float]
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class ImpressionLogStats(BaseModel):
+    running: bool
+    queued: int
+    enqueued: int
+    sampled_out: int
+    dropped: int
+    written: int
+    failed: int
+
+
+class ModelInfo(BaseModel):
+    version: Optional[str]
+    source: str
+    metadata: Dict[str, Any] = {}
@@ -0,0 +1,191 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.search.fuzzy import trigram_index
+from app.search.index import search_index, tokenize
+
+
+class MemorySearchBackend:
+    name = "memory"
+
+    def install(self, engine: Engine):
+        pass
+
+    def search(
+        self, db: Session, query: str, category: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[int], int]:
+        return search_index.ensure_fresh(db).search(query, category=category, limit=limit)
+
+    def fuzzy(
+        self, db: Session, query: str, category: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[int], int]:
+        return trigram_index.ensure_fresh(db).search(query, category=category, limit=limit)
+
+
+class SqliteFullTextBackend(MemorySearchBackend):
+    name = "sqlite-fts5"
+
+    DDL = [
+        """
+        CREATE VIRTUAL TABLE products_fts USING fts5(
+            name, category, description,
+            content='products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, category, description)
+            VALUES (new.id, new.name, new.category, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, category, description)
+            VALUES ('delete', old.id, old.name, old.category, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, category, description ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, category, description)
+            VALUES ('delete', old.id, old.name, old.category, old.description);
+            INSERT INTO products_fts(rowid, name, category, description)
+            VALUES (new.id, new.name, new.category, new.description);
+        END
+        """,
+    ]
+
+    def install(self, engine: Engine):
+        with engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            ).first()
+            if exists:
+                return
+            for statement in self.DDL:
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+    def search(
+        self, db: Session, query: str, category: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[int], int]:
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+
+        sql = """
+            WITH hits AS MATERIALIZED (
+                SELECT rowid AS id, bm25(products_fts, 3.0, 2.0, 1.0) AS rank
+                FROM products_fts WHERE products_fts MATCH :match
+            )
+            SELECT products.id, count(*) OVER () AS total
+            FROM hits JOIN products ON products.id = hits.id
+        """
+        params = {"match": match}
+        if category is not None:
+            sql += " WHERE products.category = :category"
+            params["category"] = category
+        sql += " ORDER BY hits.rank, products.id"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+
+        rows = db.execute(text(sql), params).all()
+        return [row.id for row in rows], rows[0].total if rows else 0
+
+
+class PostgresFullTextBackend:
+    name = "postgresql-tsvector"
+
+    DDL = [
+        """
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING GIN (name gin_trgm_ops)",
+    ]
+
+    def install(self, engine: Engine):
+        with engine.begin() as connection:
+            for statement in self.DDL:
+                connection.execute(text(statement))
+
+    def search(
+        self, db: Session, query: str, category: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[int], int]:
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+        match = " & ".join(terms) + ":*"
+
+        sql = """
+            SELECT products.id, count(*) OVER () AS total
+            FROM products, to_tsquery('english', :match) AS query
+            WHERE products.search_vector @@ query
+        """
+        params = {"match": match}
+        if category is not None:
+            sql += " AND products.category = :category"
+            params["category"] = category
+        sql += " ORDER BY ts_rank(products.search_vector, query) DESC, products.id"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+
+        rows = db.execute(text(sql), params).all()
+        return [row.id for row in rows], rows[0].total if rows else 0
+
+    def fuzzy(
+        self, db: Session, query: str, category: Optional[str] = None, limit: Optional[int] = None
+    ) -> Tuple[List[int], int]:
+        query = " ".join(tokenize(query))
+        if not query:
+            return [], 0
+        db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(settings.FUZZY_SIMILARITY_THRESHOLD)}
+        )
+
+        sql = """
+            SELECT products.id, count(*) OVER () AS total
+            FROM products
+            WHERE :query <% products.name
+        """
+        params = {"query": query}
+        if category is not None:
+            sql += " AND products.category = :category"
+            params["category"] = category
+        sql += " ORDER BY word_similarity(:query, products.name) DESC, products.id"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+
+        rows = db.execute(text(sql), params).all()
+        return [row.id for row in rows], rows[0].total if rows else 0
+
+
+def create_search_backend(name: str, dialect: str):
+    if name == "memory":
+        return MemorySearchBackend()
+    if name == "database":
+        if dialect == "sqlite":
+            return SqliteFullTextBackend()
+        if dialect == "postgresql":
+            return PostgresFullTextBackend()
+        raise ValueError(f"No database search backend for dialect {dialect!r}")
+    raise ValueError(f"Unknown search backend {name!r}")
+
+
+search_backend = create_search_backend(settings.SEARCH_BACKEND, engine.dialect.name)
@@ -0,0 +1,44 @@
+from typing import Any, Callable, Dict, Hashable
+
+from app.core.cache import CatalogVersion, LRUCache, catalog_version
+from app.core.config import settings
+from app.search.index import tokenize
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(tokenize(query))
+
+
+class SearchCache:
+    def __init__(self, maxsize: int, ttl_seconds: float, version: CatalogVersion):
+        self.entries = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.version = version
+        self.stale = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        version = self.version.value
+        cached = self.entries.get(key)
+        if cached is not None:
+            cached_version, value = cached
+            if cached_version == version:
+                return value
+            self.stale += 1
+        value = compute()
+        self.entries.set(key, (version, value))
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        stats["hits"] -= self.stale
+        lookups = stats["hits"] + stats["misses"] + self.stale
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["stale"] = self.stale
+        stats["catalog_version"] = self.version.value
+        return stats
+
+
+search_cache = SearchCache(
+    maxsize=settings.SEARCH_CACHE_SIZE,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    version=catalog_version
+)
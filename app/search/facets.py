@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ml.catalog import CatalogSnapshot
+
+
+def compute_facets(
+    snapshot: CatalogSnapshot,
+    product_ids: Optional[Sequence[int]],
+    category: Optional[str],
+    price_edges: Sequence[float]
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    if product_ids is None:
+        positions = np.arange(len(snapshot))
+    else:
+        positions = snapshot.positions(np.asarray(product_ids, dtype=np.int64))
+
+    codes = snapshot.category_codes[positions]
+    category_counts = np.bincount(codes, minlength=len(snapshot.categories))
+    if category is not None:
+        selected = snapshot.category_codes_for([category])
+        positions = positions[codes == selected[0]] if selected.size else positions[:0]
+
+    edges = np.asarray(price_edges, dtype=np.float64)
+    buckets = np.searchsorted(edges, snapshot.price[positions], side="right") - 1
+    price_counts = np.bincount(buckets[buckets >= 0], minlength=edges.size)
+
+    facets = {
+        "categories": [
+            {"value": snapshot.categories[code], "count": int(category_counts[code])}
+            for code in np.lexsort((np.arange(category_counts.size), -category_counts)).tolist()
+            if category_counts[code] > 0
+        ],
+        "price": [
+            {
+                "min": float(edges[bucket]),
+                "max": float(edges[bucket + 1]) if bucket + 1 < edges.size else None,
+                "count": int(price_counts[bucket])
+            }
+            for bucket in range(edges.size)
+        ],
+        "in_stock": int(snapshot.in_stock[positions].sum()),
+    }
+    return snapshot.product_ids[positions], facets
@@ -0,0 +1,141 @@
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.refresh import RefreshableIndex
+from app.models.product import Product
+from app.search.index import tokenize
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    grams = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex(RefreshableIndex):
+    def __init__(self, threshold: float = 0.5, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.threshold = threshold
+        self.postings: Dict[str, Set[int]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self.grams: Dict[int, FrozenSet[str]] = {}
+        self.categories: Dict[int, str] = {}
+        self.positions: Dict[int, int] = {}
+        self.codes: Dict[str, int] = {}
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.category_codes = np.empty(0, dtype=np.int32)
+
+    def _build(self, db: Session) -> "TrigramIndex":
+        rows = db.execute(select(Product.id, Product.name, Product.category)).all()
+        fresh = TrigramIndex(self.threshold, self.ttl_seconds)
+        grams = [trigrams(row.name) for row in rows]
+        fresh.codes = {category: code for code, category in enumerate(sorted({row.category for row in rows}))}
+        fresh.product_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        fresh.sizes = np.fromiter((len(product_grams) for product_grams in grams), dtype=np.int64, count=len(rows))
+        fresh.category_codes = np.fromiter((fresh.codes[row.category] for row in rows), dtype=np.int32, count=len(rows))
+        for position, (row, product_grams) in enumerate(zip(rows, grams)):
+            for gram in product_grams:
+                fresh.postings.setdefault(gram, set()).add(position)
+            fresh.grams[row.id] = product_grams
+            fresh.categories[row.id] = row.category
+            fresh.positions[row.id] = position
+        for gram in fresh.postings:
+            fresh._postings_array(gram)
+        return fresh
+
+    def _swap(self, fresh: "TrigramIndex"):
+        self.postings = fresh.postings
+        self._arrays = fresh._arrays
+        self.grams = fresh.grams
+        self.categories = fresh.categories
+        self.positions = fresh.positions
+        self.codes = fresh.codes
+        self.product_ids = fresh.product_ids
+        self.sizes = fresh.sizes
+        self.category_codes = fresh.category_codes
+
+    def _same_content(self, fresh: "TrigramIndex") -> bool:
+        return fresh.grams == self.grams and fresh.categories == self.categories
+
+    def _apply(self, products: Iterable[Product]):
+        for product in products:
+            self._remove(product.id)
+            self._add(product.id, product.name, product.category)
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[int], int]:
+        wanted = trigrams(query)
+        if not wanted:
+            return [], 0
+        required = math.ceil(self.threshold * len(wanted))
+
+        with self._lock:
+            postings = [self._postings_array(gram) for gram in wanted if gram in self.postings]
+            if len(postings) < required:
+                return [], 0
+            positions, shared = np.unique(np.concatenate(postings), return_counts=True)
+            matched = shared >= required
+            if category is not None:
+                if category not in self.codes:
+                    return [], 0
+                matched &= self.category_codes[positions] == self.codes[category]
+            positions, shared = positions[matched], shared[matched]
+            product_ids = self.product_ids[positions]
+            sizes = self.sizes[positions]
+
+        similarity = shared / (len(wanted) + sizes - shared)
+        order = np.lexsort((product_ids, -similarity, -shared))
+        if limit is not None:
+            order = order[:limit]
+        return product_ids[order].tolist(), int(product_ids.size)
+
+    def _postings_array(self, gram: str) -> np.ndarray:
+        array = self._arrays.get(gram)
+        if array is None:
+            postings = self.postings[gram]
+            array = self._arrays[gram] = np.fromiter(postings, dtype=np.int64, count=len(postings))
+        return array
+
+    def _add(self, product_id: int, name: str, category: str):
+        grams = trigrams(name)
+        if category not in self.codes:
+            self.codes[category] = len(self.codes)
+        position = self.positions.get(product_id)
+        if position is None:
+            position = self.positions[product_id] = self.product_ids.size
+            self.product_ids = np.append(self.product_ids, product_id)
+            self.sizes = np.append(self.sizes, len(grams))
+            self.category_codes = np.append(self.category_codes, np.int32(self.codes[category]))
+        else:
+            self.sizes[position] = len(grams)
+            self.category_codes[position] = self.codes[category]
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(position)
+            self._arrays.pop(gram, None)
+        self.grams[product_id] = grams
+        self.categories[product_id] = category
+
+    def _remove(self, product_id: int):
+        grams = self.grams.pop(product_id, None)
+        if grams is None:
+            return
+        for gram in grams:
+            self._arrays.pop(gram, None)
+            postings = self.postings[gram]
+            postings.discard(self.positions[product_id])
+            if not postings:
+                del self.postings[gram]
+        self.categories.pop(product_id, None)
+
+
+trigram_index = TrigramIndex(
+    threshold=settings.FUZZY_SIMILARITY_THRESHOLD,
+    ttl_seconds=settings.SEARCH_INDEX_TTL_SECONDS
+)
@@ -0,0 +1,175 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.refresh import RefreshableIndex
+from app.models.product import Product
+
+TOKEN_PATTERN = re.compile(r"\w+")
+NAME_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def document_terms(name: str, category: str, description: Optional[str]) -> Tuple[Dict[str, float], float]:
+    terms: Counter = Counter()
+    length = 0.0
+    for text, weight in ((name, NAME_WEIGHT), (category, CATEGORY_WEIGHT), (description, DESCRIPTION_WEIGHT)):
+        tokens = tokenize(text)
+        length += weight * len(tokens)
+        for token in tokens:
+            terms[token] += weight
+    return dict(terms), length
+
+
+class SearchIndex(RefreshableIndex):
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        super().__init__(ttl_seconds)
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.tokens: List[str] = []
+        self.documents: Dict[int, Tuple[str, ...]] = {}
+        self.lengths: Dict[int, float] = {}
+        self.categories: Dict[int, str] = {}
+        self.total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _build(self, db: Session) -> "SearchIndex":
+        rows = db.execute(
+            select(Product.id, Product.name, Product.category, Product.description)
+        ).all()
+        fresh = SearchIndex(self.ttl_seconds)
+        for row in rows:
+            fresh._add(row.id, row.name, row.category, row.description)
+        fresh.tokens = sorted(fresh.postings)
+        return fresh
+
+    def _swap(self, fresh: "SearchIndex"):
+        self.postings = fresh.postings
+        self.tokens = fresh.tokens
+        self.documents = fresh.documents
+        self.lengths = fresh.lengths
+        self.categories = fresh.categories
+        self.total_length = fresh.total_length
+
+    def _same_content(self, fresh: "SearchIndex") -> bool:
+        return (
+            fresh.documents == self.documents
+            and fresh.lengths == self.lengths
+            and fresh.categories == self.categories
+        )
+
+    def _apply(self, products: Iterable[Product]):
+        for product in products:
+            self._remove(product.id)
+            self._add(product.id, product.name, product.category, product.description, keep_sorted=True)
+
+    def search(self, query: str, category: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[int], int]:
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+
+        with self._lock:
+            if not self.documents:
+                return [], 0
+            clauses = [self._exact(term) for term in terms[:-1]]
+            clauses.append(self._with_prefix(terms[-1]))
+            clauses.sort(key=lambda clause: len(clause[0]))
+
+            matches = set(clauses[0][0])
+            for ids, _ in clauses[1:]:
+                if not matches:
+                    break
+                matches.intersection_update(ids)
+            if category is not None:
+                matches = {product_id for product_id in matches if self.categories.get(product_id) == category}
+
+            n_documents = len(self.documents)
+            average_length = self.total_length / n_documents or 1.0
+            scores = dict.fromkeys(matches, 0.0)
+            for _, tokens in clauses:
+                for token, boost in tokens:
+                    postings = self.postings[token]
+                    idf = boost * math.log(1 + (n_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if len(postings) < len(matches):
+                        hits = ((product_id, frequency) for product_id, frequency in postings.items() if product_id in scores)
+                    else:
+                        hits = ((product_id, postings[product_id]) for product_id in matches if product_id in postings)
+                    for product_id, frequency in hits:
+                        norm = K1 * (1 - B + B * self.lengths[product_id] / average_length)
+                        scores[product_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+        key = lambda product_id: (-scores[product_id], product_id)
+        if limit is not None and limit < len(matches):
+            return heapq.nsmallest(limit, matches, key=key), len(matches)
+        return sorted(matches, key=key), len(matches)
+
+    def _exact(self, term: str) -> Tuple[Iterable[int], List[Tuple[str, float]]]:
+        postings = self.postings.get(term)
+        if not postings:
+            return (), []
+        return postings.keys(), [(term, 1.0)]
+
+    def _with_prefix(self, prefix: str) -> Tuple[Iterable[int], List[Tuple[str, float]]]:
+        start = bisect_left(self.tokens, prefix)
+        stop = start
+        while stop < len(self.tokens) and self.tokens[stop].startswith(prefix):
+            stop += 1
+        expansions = [token for token in self.tokens[start:stop] if token != prefix]
+        if len(expansions) > MAX_PREFIX_EXPANSIONS:
+            expansions = heapq.nlargest(MAX_PREFIX_EXPANSIONS, expansions, key=lambda token: len(self.postings[token]))
+
+        ids, tokens = self._exact(prefix)
+        ids = set(ids)
+        for token in expansions:
+            ids.update(self.postings[token])
+            tokens.append((token, PREFIX_WEIGHT))
+        return ids, tokens
+
+    def _add(self, product_id: int, name: str, category: str, description: Optional[str], keep_sorted: bool = False):
+        terms, length = document_terms(name, category, description)
+        for token, frequency in terms.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                if keep_sorted:
+                    insort(self.tokens, token)
+            postings[product_id] = frequency
+        self.documents[product_id] = tuple(terms)
+        self.lengths[product_id] = length
+        self.categories[product_id] = category
+        self.total_length += length
+
+    def _remove(self, product_id: int):
+        tokens = self.documents.pop(product_id, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            postings = self.postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self.postings[token]
+                position = bisect_left(self.tokens, token)
+                if position < len(self.tokens) and self.tokens[position] == token:
+                    del self.tokens[position]
+        self.total_length -= self.lengths.pop(product_id)
+        self.categories.pop(product_id, None)
+
+
+search_index = SearchIndex(ttl_seconds=settings.SEARCH_INDEX_TTL_SECONDS)
@@ -0,0 +1,140 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.refresh import RefreshableIndex
+from app.ml.recommender import recommender
+from app.models.product import Product
+from app.search.index import tokenize
+
+RankKey = Tuple[int, float, int]
+
+
+class Suggester(RefreshableIndex):
+    bumps_catalog_version = False
+
+    def __init__(self, ttl_seconds: Optional[int] = None, cache_prefix_length: int = 2):
+        super().__init__(ttl_seconds)
+        self.cache_prefix_length = cache_prefix_length
+        self.tokens: List[str] = []
+        self.entries: Dict[str, List[RankKey]] = {}
+        self.names: Dict[int, str] = {}
+        self.name_tokens: Dict[int, Tuple[str, ...]] = {}
+        self.ranks: Dict[int, RankKey] = {}
+        self._short_prefixes: Dict[Tuple[str, int], List[str]] = {}
+
+    def _build(self, db: Session) -> "Suggester":
+        rows = db.execute(select(Product.id, Product.name, Product.stock)).all()
+        popularity = recommender.popularity.ensure_fresh(db).log_weights_for(
+            np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+        )
+
+        fresh = Suggester(self.ttl_seconds, self.cache_prefix_length)
+        for row, score in zip(rows, popularity.tolist()):
+            fresh._add(row.id, row.name, rank_key(row.id, row.stock, score))
+        for entries in fresh.entries.values():
+            entries.sort()
+        fresh.tokens = sorted(fresh.entries)
+        return fresh
+
+    def _swap(self, fresh: "Suggester"):
+        self.tokens = fresh.tokens
+        self.entries = fresh.entries
+        self.names = fresh.names
+        self.name_tokens = fresh.name_tokens
+        self.ranks = fresh.ranks
+        self._short_prefixes = {}
+
+    def _apply(self, products: Iterable[Product]):
+        products = list(products)
+        popularity = recommender.popularity.log_weights_for(
+            np.fromiter((product.id for product in products), dtype=np.int64, count=len(products))
+        )
+        for product, score in zip(products, popularity.tolist()):
+            self._remove(product.id)
+            self._add(product.id, product.name, rank_key(product.id, product.stock, score), keep_sorted=True)
+        self._short_prefixes = {}
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        *required, prefix = terms
+        cache_key = (prefix, limit)
+        cacheable = not required and len(prefix) <= self.cache_prefix_length
+
+        with self._lock:
+            if cacheable and cache_key in self._short_prefixes:
+                return self._short_prefixes[cache_key]
+
+            start = bisect_left(self.tokens, prefix)
+            stop = start
+            while stop < len(self.tokens) and self.tokens[stop].startswith(prefix):
+                stop += 1
+
+            suggestions: List[str] = []
+            seen_products = set()
+            seen_names = set()
+            for _, _, product_id in heapq.merge(*(self.entries[token] for token in self.tokens[start:stop])):
+                if product_id in seen_products:
+                    continue
+                seen_products.add(product_id)
+                if required and not set(required).issubset(self.name_tokens[product_id]):
+                    continue
+                name = self.names[product_id]
+                if name.lower() in seen_names:
+                    continue
+                seen_names.add(name.lower())
+                suggestions.append(name)
+                if len(suggestions) == limit:
+                    break
+
+            if cacheable:
+                self._short_prefixes[cache_key] = suggestions
+        return suggestions
+
+    def _add(self, product_id: int, name: str, rank: RankKey, keep_sorted: bool = False):
+        tokens = tuple(dict.fromkeys(tokenize(name)))
+        for token in tokens:
+            entries = self.entries.get(token)
+            if entries is None:
+                entries = self.entries[token] = []
+                if keep_sorted:
+                    insort(self.tokens, token)
+            if keep_sorted:
+                insort(entries, rank)
+            else:
+                entries.append(rank)
+        self.names[product_id] = name
+        self.name_tokens[product_id] = tokens
+        self.ranks[product_id] = rank
+
+    def _remove(self, product_id: int):
+        tokens = self.name_tokens.pop(product_id, None)
+        if tokens is None:
+            return
+        rank = self.ranks.pop(product_id)
+        del self.names[product_id]
+        for token in tokens:
+            entries = self.entries[token]
+            position = bisect_left(entries, rank)
+            if position < len(entries) and entries[position] == rank:
+                del entries[position]
+            if not entries:
+                del self.entries[token]
+                position = bisect_left(self.tokens, token)
+                if position < len(self.tokens) and self.tokens[position] == token:
+                    del self.tokens[position]
+
+
+def rank_key(product_id: int, stock: int, popularity: float) -> RankKey:
+    return (0 if stock > 0 else 1, -popularity, product_id)
+
+
+suggester = Suggester(ttl_seconds=settings.SEARCH_INDEX_TTL_SECONDS)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation and latency benchmark for app/ml/recommender.py.
+
+Generates a synthetic catalog, users and orders in a scratch database, holds out
+each evaluated user's last order and reports latency, queries per call, peak
+memory, recall@k and catalog coverage.
+
+Usage: python -m benchmarks.recommender --scale 1k
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SCALES = {
+    "1k": {"users": 1_000, "products": 1_000, "orders": 5_000},
+    "100k": {"users": 20_000, "products": 100_000, "orders": 200_000},
+    "1m": {"users": 100_000, "products": 1_000_000, "orders": 1_000_000},
+}
+
+ADJECTIVES = ["fresh", "organic", "crispy", "classic", "spicy", "sweet", "smoked", "creamy", "whole", "premium"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--users", type=int, help="override the number of users for the scale")
+    parser.add_argument("--products", type=int, help="override the number of products for the scale")
+    parser.add_argument("--orders", type=int, help="override the number of orders for the scale")
+    parser.add_argument("--requests", type=int, default=500, help="recommendation calls to time")
+    parser.add_argument("--eval-users", type=int, default=500, help="users with a held-out order")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--skip-content", action="store_true", help="do not build the content neighbour table")
+    parser.add_argument("--fit-memory", action="store_true", help="trace peak memory while fitting (slows fits)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    workdir = tempfile.mkdtemp(prefix="sanset-bench-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/bench.db"
+    os.environ["RECOMMENDER_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["RECOMMENDER_RETRAIN_ENABLED"] = "false"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate(db, engine, sizes, eval_users, seed):
+    from sqlalchemy import insert
+    from app.db.session import Base
+    from app.models import address, cart, recommendation  # noqa: F401
+    from app.models.order import Order, OrderItem
+    from app.models.product import Product
+    from app.models.user import User
+
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(seed)
+    n_users, n_products, n_orders = sizes["users"], sizes["products"], sizes["orders"]
+    n_categories = int(np.clip(n_products // 1000, 5, 200))
+    now = datetime.utcnow()
+
+    def chunks(rows, size=10_000):
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    users = [
+        {"id": i, "full_name": f"User {i}", "email": f"user{i}@bench.local", "phone": "0", "hashed_password": "x"}
+        for i in range(1, n_users + 1)
+    ]
+    for chunk in chunks(users):
+        db.execute(insert(User), chunk)
+
+    categories = [f"category-{c}" for c in range(n_categories)]
+    adjectives = rng.integers(0, len(ADJECTIVES), n_products)
+    in_stock = rng.random(n_products) > 0.05
+    prices = np.round(rng.uniform(10, 500, n_products), 2)
+    products = [
+        {
+            "id": i + 1,
+            "name": f"{ADJECTIVES[adjectives[i]].title()} {categories[i % n_categories]} item {i}",
+            "slug": f"product-{i + 1}",
+            "category": categories[i % n_categories],
+            "description": f"{ADJECTIVES[adjectives[i]]} {categories[i % n_categories]} product number {i}",
+            "price": float(prices[i]),
+            "stock": 25 if in_stock[i] else 0,
+            "attributes": {"organic": bool(adjectives[i] == 1)},
+        }
+        for i in range(n_products)
+    ]
+    for chunk in chunks(products):
+        db.execute(insert(Product), chunk)
+
+    per_category = max(1, n_products // n_categories)
+    favourite = rng.integers(0, n_categories, (n_users + 1, 2))
+
+    def draw_products(user_id, size):
+        ranks = np.minimum(rng.zipf(1.3, size) - 1, per_category - 1)
+        own = rng.random(size) < 0.8
+        category = np.where(own, favourite[user_id, rng.integers(0, 2, size)], rng.integers(0, n_categories, size))
+        product_index = np.minimum(category + ranks * n_categories, n_products - 1)
+        return np.unique(product_index + 1)
+
+    order_users = rng.integers(1, n_users + 1, n_orders)
+    guaranteed = np.repeat(np.arange(1, eval_users + 1), 2)[:n_orders]
+    order_users[:guaranteed.size] = guaranteed
+    placed_at = np.sort(rng.uniform(0, 60 * 86400, n_orders))[::-1]
+
+    last_order = {}
+    for order_index in range(n_orders):
+        last_order[int(order_users[order_index])] = order_index
+
+    held_out = {}
+    orders, items = [], []
+    item_id = 1
+    for order_index in range(n_orders):
+        user_id = int(order_users[order_index])
+        basket = draw_products(user_id, int(rng.integers(1, 6)))
+        if user_id <= eval_users and last_order[user_id] == order_index:
+            held_out[user_id] = set(basket.tolist())
+            continue
+        orders.append({
+            "id": order_index + 1,
+            "user_id": user_id,
+            "total_amount": float(prices[basket - 1].sum()),
+            "placed_at": now - timedelta(seconds=float(placed_at[order_index])),
+        })
+        for product_id in basket.tolist():
+            items.append({
+                "id": item_id,
+                "order_id": order_index + 1,
+                "product_id": product_id,
+                "qty": 1,
+                "price_at_purchase": float(prices[product_id - 1]),
+            })
+            item_id += 1
+
+    for chunk in chunks(orders):
+        db.execute(insert(Order), chunk)
+    for chunk in chunks(items):
+        db.execute(insert(OrderItem), chunk)
+    db.commit()
+
+    return held_out, len(orders), len(items)
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def run(args):
+    configure_environment(args)
+
+    from sqlalchemy import event
+    from app.crud import recommendation as crud_recommendation
+    from app.db.session import SessionLocal, engine
+    from app.ml.recommender import RecommendationEngine
+
+    sizes = dict(SCALES[args.scale])
+    for key in ("users", "products", "orders"):
+        if getattr(args, key):
+            sizes[key] = getattr(args, key)
+    eval_users = min(args.eval_users, sizes["users"])
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    held_out, n_orders, n_items = generate(db, engine, sizes, eval_users, args.seed)
+    generation_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start in range(1, sizes["users"] + 1, 5_000):
+        crud_recommendation.get_or_create_profiles(db, range(start, min(start + 5_000, sizes["users"] + 1)))
+    profile_seconds = time.perf_counter() - started
+
+    recommender = RecommendationEngine()
+    models = {
+        "catalog": recommender.catalog,
+        "co_purchase": recommender.co_purchase,
+        "content": recommender.content,
+        "popularity": recommender.popularity,
+    }
+    if args.skip_content:
+        del models["content"]
+        recommender.content.ttl_seconds = None
+        recommender.content.built_at = time.monotonic()
+
+    fit_seconds = {}
+    if args.fit_memory:
+        tracemalloc.start()
+    for name, model in models.items():
+        started = time.perf_counter()
+        model.refresh(db)
+        fit_seconds[name] = time.perf_counter() - started
+    fit_peak = tracemalloc.get_traced_memory()[1] if args.fit_memory else None
+    tracemalloc.stop()
+
+    queries = [0]
+
+    def count_query(*_):
+        queries[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count_query)
+
+    rng = np.random.default_rng(args.seed)
+    request_users = rng.integers(1, sizes["users"] + 1, args.requests)
+    latencies, query_counts = [], []
+    for user_id in request_users.tolist():
+        queries[0] = 0
+        started = time.perf_counter()
+        recommender.get_recommendations(db, user_id, limit=args.k, use_cache=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(queries[0])
+
+    tracemalloc.start()
+    for user_id in request_users[:min(50, args.requests)].tolist():
+        recommender.get_recommendations(db, user_id, limit=args.k, use_cache=False)
+    _, request_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    recalls = []
+    recommended = set()
+    for user_id, expected in held_out.items():
+        ids = [item["product_id"] for item in recommender.get_recommendations(db, user_id, limit=args.k, use_cache=False)]
+        recommended.update(ids)
+        recalls.append(len(expected.intersection(ids)) / len(expected))
+
+    event.remove(engine, "before_cursor_execute", count_query)
+    db.close()
+
+    return {
+        "scale": args.scale,
+        "users": sizes["users"],
+        "products": sizes["products"],
+        "orders": n_orders,
+        "order_items": n_items,
+        "generation_seconds": round(generation_seconds, 2),
+        "profile_seconds": round(profile_seconds, 2),
+        "fit_seconds": {name: round(seconds, 3) for name, seconds in fit_seconds.items()},
+        "fit_peak_mb": round(fit_peak / 2**20, 1) if fit_peak is not None else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+        "queries_per_call": {
+            "mean": round(float(np.mean(query_counts)) if query_counts else 0.0, 2),
+            "max": max(query_counts, default=0),
+        },
+        "request_peak_mb": round(request_peak / 2**20, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        f"recall@{args.k}": round(float(np.mean(recalls)) if recalls else 0.0, 4),
+        "coverage": round(len(recommended) / sizes["products"], 4),
+        "eval_users": len(held_out),
+    }
+
+
+def main():
+    args = parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{name}={item}" for name, item in value.items())
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Bulk import products from an NDJSON or CSV file straight into the database.
+Usage: python import_products.py products.ndjson [--format csv] [--batch-size 1000]
+Running servers pick up the new catalog on their next listing or search request.
+"""
+
+import argparse
+import json
+
+from app.core.config import settings
+from app.crud.product_import import READERS, import_products
+from app.db.session import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import products")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(READERS))
+    parser.add_argument("--batch-size", type=int, default=settings.PRODUCT_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8", newline="") as stream:
+            report = import_products(db, READERS[format](stream), batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"✓ Processed {report['processed']} rows: {report['upserted']} upserted, {report['failed']} failed")
+    for error in report["errors"]:
+        print(f"✗ {json.dumps(error)}")
+
+
+if __name__ == "__main__":
+    main()
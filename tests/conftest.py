@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="sanset-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+os.environ["RECOMMENDER_ARTIFACT_DIR"] = os.path.join(_workdir, "artifacts")
+os.environ["RECOMMENDER_RETRAIN_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.crud import product as crud_product
+from app.db.session import Base, SessionLocal, engine
+from app.main import app
+from app.ml.recommender import recommender
+from app.models.product import Product
+from app.models.user import User
+
+CATEGORIES = ["Bakery", "Dairy", "Fruits"]
+
+
+@pytest.fixture
+def db():
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    crud_product._catalog_sync.update(state=None, id=0, updated_at=None)
+    crud_product.notify_catalog_reloaded()
+    for model in (recommender.co_purchase, recommender.content, recommender.popularity):
+        model.invalidate()
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+@pytest.fixture
+def users(db):
+    users = [
+        User(full_name="Admin", email="admin@example.com", phone="0", hashed_password="x", is_admin=True),
+        User(full_name="Shopper", email="shopper@example.com", phone="0", hashed_password="x"),
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+@pytest.fixture
+def admin_headers(users):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(users[0].id)})}"}
+
+
+@pytest.fixture
+def user_headers(users):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(users[1].id)})}"}
+
+
+@pytest.fixture
+def products(db):
+    products = [
+        Product(
+            name=f"{CATEGORIES[i % len(CATEGORIES)]} item {i}",
+            slug=f"product-{i}",
+            category=CATEGORIES[i % len(CATEGORIES)],
+            description=f"tasty product number {i}",
+            price=10 + i,
+            stock=0 if i % 7 == 0 else 20,
+            attributes={},
+        )
+        for i in range(25)
+    ]
+    db.add_all(products)
+    db.commit()
+    return products
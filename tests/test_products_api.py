@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.ml.recommender import recommender
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+PRODUCTS = "/api/v1/products"
+
+
+def test_cursor_pages_cover_the_catalog_once(client, products):
+    seen = []
+    response = client.get(PRODUCTS, params={"size": 10}).json()
+    seen += [item["id"] for item in response["items"]]
+    while response["next_cursor"]:
+        response = client.get(PRODUCTS, params={"size": 10, "cursor": response["next_cursor"]}).json()
+        assert response["page"] is None
+        assert response["total"] == len(products)
+        seen += [item["id"] for item in response["items"]]
+
+    assert seen == sorted(product.id for product in products)
+
+
+def test_cursor_pages_filter_by_category(client, products):
+    first = client.get(PRODUCTS, params={"size": 3, "category": "Dairy"}).json()
+    second = client.get(PRODUCTS, params={"size": 3, "category": "Dairy", "cursor": first["next_cursor"]}).json()
+
+    dairy = sorted(product.id for product in products if product.category == "Dairy")
+    assert [item["id"] for item in first["items"] + second["items"]] == dairy[:6]
+    assert second["total"] == len(dairy)
+
+
+def test_invalid_cursor_is_rejected(client, products):
+    assert client.get(PRODUCTS, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_listing_etag_revalidates(client, products):
+    response = client.get(PRODUCTS, params={"size": 5})
+    etag = response.headers["etag"]
+
+    assert client.get(PRODUCTS, params={"size": 5}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(PRODUCTS, params={"size": 5}, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(PRODUCTS, params={"size": 6}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_listing_etag_follows_out_of_band_writes(client, products):
+    etag = client.get(PRODUCTS, params={"size": 5}).headers["etag"]
+
+    other = SessionLocal()
+    product = other.get(Product, products[0].id)
+    product.price = 999
+    product.updated_at = datetime.utcnow()
+    other.commit()
+    other.close()
+
+    response = client.get(PRODUCTS, params={"size": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["items"][0]["price"] == 999
+
+
+def test_product_etag_follows_out_of_band_writes(client, products):
+    url = f"{PRODUCTS}/{products[1].id}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    other = SessionLocal()
+    product = other.get(Product, products[1].id)
+    product.name = "Renamed"
+    product.updated_at = datetime.utcnow()
+    other.commit()
+    other.close()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_popular_etag_changes_after_refit(client, db, users, products):
+    etag = client.get(PRODUCTS, params={"sort": "popular", "size": 5}).headers["etag"]
+
+    order = Order(user_id=users[1].id, total_amount=1.0)
+    db.add(order)
+    db.flush()
+    db.add(OrderItem(order_id=order.id, product_id=products[-1].id, qty=50, price_at_purchase=1.0))
+    db.commit()
+    recommender.popularity.fit(db)
+
+    response = client.get(PRODUCTS, params={"sort": "popular", "size": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] == products[-1].id
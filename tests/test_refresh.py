@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from app.core.cache import catalog_version
+from app.core.refresh import RefreshableIndex
+from app.crud import product as crud_product
+from app.ml.catalog import catalog
+from app.ml.recommender import recommender
+from app.schemas.product import ProductUpdate
+
+
+class FakeIndex(RefreshableIndex):
+    def __init__(self, source, ttl_seconds=None):
+        super().__init__(ttl_seconds)
+        self.source = source
+        self.items = {}
+        self.builds = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def _build(self, db):
+        self.builds += 1
+        fresh = FakeIndex(self.source)
+        fresh.items = dict(self.source)
+        self.started.set()
+        self.release.wait(5)
+        return fresh
+
+    def _swap(self, fresh):
+        self.items = fresh.items
+
+    def _apply(self, change):
+        self.items.update(change)
+
+    def _same_content(self, fresh):
+        return fresh.items == self.items
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def source():
+    return {"a": 1}
+
+
+def test_first_build_blocks_and_later_builds_do_not(source):
+    index = FakeIndex(source, ttl_seconds=0.05).ensure_fresh(None)
+    assert index.items == {"a": 1} and not index.is_stale
+
+    time.sleep(0.1)
+    source["b"] = 2
+    index.release.clear()
+    index.started.clear()
+    index.ensure_fresh(None)
+    index.started.wait(5)
+    assert index.items == {"a": 1}
+
+    index.release.set()
+    _wait_for(lambda: index.items == {"a": 1, "b": 2})
+    assert not index.is_stale
+
+
+def test_update_during_background_build_is_replayed_not_discarded(source):
+    index = FakeIndex(source, ttl_seconds=0.05).ensure_fresh(None)
+    built_at = index.built_at
+    time.sleep(0.1)
+
+    source["b"] = 2
+    index.release.clear()
+    index.started.clear()
+    index.ensure_fresh(None)
+    index.started.wait(5)
+    index.update({"c": 3})
+    assert index.items == {"a": 1, "c": 3}
+
+    index.release.set()
+    _wait_for(lambda: index.built_at != built_at)
+    assert index.items == {"a": 1, "b": 2, "c": 3}
+    assert not index.is_stale
+    assert index.builds == 2
+
+
+def test_stale_index_starts_one_background_build(source):
+    index = FakeIndex(source, ttl_seconds=0.05).ensure_fresh(None)
+    time.sleep(0.1)
+
+    index.release.clear()
+    for _ in range(5):
+        index.ensure_fresh(None)
+    index.release.set()
+    _wait_for(lambda: not index.is_stale)
+    assert index.builds == 2
+
+
+def test_invalidate_during_build_leaves_index_stale(source):
+    index = FakeIndex(source).ensure_fresh(None)
+
+    index.release.clear()
+    index.started.clear()
+    thread = threading.Thread(target=index.refresh, args=(None,))
+    thread.start()
+    index.started.wait(5)
+    index.invalidate()
+    index.release.set()
+    thread.join()
+
+    assert index.is_stale
+
+
+def test_catalog_version_moves_only_when_content_changes(source):
+    index = FakeIndex(source).ensure_fresh(None)
+
+    version = catalog_version.value
+    index.refresh(None)
+    assert catalog_version.value == version
+
+    source["b"] = 2
+    index.refresh(None)
+    assert catalog_version.value != version
+
+
+def test_popular_ranking_survives_stock_updates(db, products):
+    crud_product.get_products(db, limit=5, sort="popular")
+    ranking = recommender.popularity.ranking
+
+    crud_product.update_product(db, products[1].id, ProductUpdate(stock=3, price=1))
+    recommender.popularity.record([(products[1].id, 5)])
+    page = crud_product.get_products(db, limit=5, sort="popular")
+    assert recommender.popularity.ranking is ranking
+    assert page["items"][0].id == products[1].id
+
+    crud_product.update_product(db, products[1].id, ProductUpdate(category="Fruits"))
+    page = crud_product.get_products(db, limit=5, sort="popular", category="Fruits")
+    assert recommender.popularity.ranking is not ranking
+    assert page["items"][0].id == products[1].id
+
+
+def test_catalog_updates_during_rebuild_are_kept(db, products):
+    catalog.ensure_fresh(db)
+    crud_product.update_product(db, products[2].id, ProductUpdate(stock=0))
+    catalog.refresh(db)
+
+    assert not catalog.in_stock[catalog.positions([products[2].id])][0]
+    assert not catalog.is_stale
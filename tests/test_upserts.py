@@ -0,0 +1,112 @@
+import io
+import json
+import threading
+
+from app.crud import cart as crud_cart
+from app.crud import recommendation as crud_recommendation
+from app.crud.product_import import import_products, read_csv, read_ndjson
+from app.db.session import SessionLocal
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
+from app.models.recommendation import UserAffinityProfile
+
+
+def test_cart_add_merges_quantities(client, user_headers, products):
+    for qty in (1, 2, 3):
+        response = client.post("/api/v1/cart/add", json={"product_id": products[1].id, "qty": qty}, headers=user_headers)
+    client.post("/api/v1/cart/add", json={"product_id": products[2].id}, headers=user_headers)
+
+    cart = response.json()
+    assert [(item["product_id"], item["qty"]) for item in cart["items"]] == [(products[1].id, 6)]
+    cart = client.get("/api/v1/cart", headers=user_headers).json()
+    assert [(item["product_id"], item["qty"]) for item in cart["items"]] == [(products[1].id, 6), (products[2].id, 1)]
+    assert cart["total"] == products[1].price * 6 + products[2].price
+
+
+def test_concurrent_cart_adds_keep_one_row(db, users, products):
+    user_id, product_id = users[1].id, products[3].id
+
+    def add():
+        session = SessionLocal()
+        try:
+            for _ in range(5):
+                crud_cart.add_to_cart(session, user_id, product_id, 1)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=add) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert db.query(Cart).count() == 1
+    assert [(item.product_id, item.qty) for item in db.query(CartItem)] == [(product_id, 20)]
+
+
+def test_cart_remove(client, user_headers, products):
+    client.post("/api/v1/cart/add", json={"product_id": products[1].id}, headers=user_headers)
+    client.post("/api/v1/cart/add", json={"product_id": products[2].id}, headers=user_headers)
+
+    cart = client.post("/api/v1/cart/remove", json={"product_id": products[1].id}, headers=user_headers).json()
+    assert [item["product_id"] for item in cart["items"]] == [products[2].id]
+
+
+def _ndjson(rows):
+    return read_ndjson(io.StringIO("\n".join(json.dumps(row) for row in rows)))
+
+
+def test_import_inserts_then_updates_by_slug(db):
+    report = import_products(db, _ndjson([
+        {"name": "Bread", "slug": "bread", "category": "Bakery", "price": 2.5, "stock": 10},
+        {"name": "Milk", "slug": "milk", "category": "Dairy", "price": 1.2, "stock": 5},
+    ]))
+    assert (report["processed"], report["upserted"], report["failed"]) == (2, 2, 0)
+    bread = db.query(Product).filter(Product.slug == "bread").one()
+    bread_id, created_at = bread.id, bread.created_at
+
+    report = import_products(db, read_csv(io.StringIO("name,slug,category,price,stock\nRye bread,bread,Bakery,3.0,4\n")))
+    assert (report["processed"], report["upserted"], report["failed"]) == (1, 1, 0)
+
+    db.expire_all()
+    bread = db.query(Product).filter(Product.slug == "bread").one()
+    assert (bread.id, bread.created_at, bread.name, bread.stock) == (bread_id, created_at, "Rye bread", 4)
+    assert db.query(Product).count() == 2
+
+
+def test_import_reports_every_row(db):
+    report = import_products(db, _ndjson([
+        {"name": "Bread", "slug": "bread", "category": "Bakery", "price": 2.5, "stock": 10},
+        {"name": "Bread again", "slug": "bread", "category": "Bakery", "price": 2.0, "stock": 3},
+        {"name": "No price", "slug": "no-price", "category": "Bakery", "stock": 3},
+    ]))
+
+    assert (report["processed"], report["upserted"], report["failed"]) == (3, 1, 2)
+    assert [(error["row"], error["slug"]) for error in report["errors"]] == [(1, "bread"), (3, "no-price")]
+    assert db.query(Product).filter(Product.slug == "bread").one().name == "Bread again"
+
+
+def test_record_purchases_creates_profile(db, users, products):
+    crud_recommendation.record_purchases(db, users[1].id, [(products[1].id, products[1].category)])
+    db.commit()
+
+    profile = db.get(UserAffinityProfile, users[1].id)
+    assert profile.purchased_product_ids == [products[1].id]
+    assert profile.category_counts == {products[1].category: 1}
+
+
+def test_record_purchases_after_concurrent_profile_insert(db, users, products, monkeypatch):
+    build_profile = crud_recommendation.build_profile
+
+    def racing_build_profile(session, user_id):
+        other = SessionLocal()
+        crud_recommendation.save_profiles(other, [build_profile(other, user_id)])
+        other.close()
+        return build_profile(session, user_id)
+
+    monkeypatch.setattr(crud_recommendation, "build_profile", racing_build_profile)
+    crud_recommendation.record_purchases(db, users[1].id, [(products[2].id, products[2].category)])
+    db.commit()
+
+    assert db.query(UserAffinityProfile).count() == 1
+    assert db.get(UserAffinityProfile, users[1].id).purchased_product_ids == [products[2].id]